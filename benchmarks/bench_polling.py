@@ -0,0 +1,231 @@
+""" Benchmark the polling path of pyHaier against MockHaierCloud
+
+Runs each scenario against a simulated fleet of 1, 10, 100 and 1000 ACs
+served from a separate process, so CPU time and memory are the client's:
+
+    get_devices        fetch the device list and create the devices
+    coordinator_cycle  one coordinator poll: fetch_states of the whole
+                       fleet and apply the reports, the device list cached
+    device_update      Device.update of every device at once, the path of
+                       entities that poll on their own
+
+Reports requests per cycle, wall-clock cycle time, p50/p99 request latency
+seen by the client, CPU time and peak traced memory as JSON:
+
+    python benchmarks/bench_polling.py --output bench.json
+
+The client's rate limit buckets are lifted so the numbers measure the
+request pipeline, not the configured request rate.
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Optional
+
+from aiohttp import ClientSession
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "custom_components", "haier"))
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+from pyHaier import create_devices, get_devices  # noqa: E402
+from pyHaier.client import DEFAULT_RATE_LIMITS, HaierClient  # noqa: E402
+from pyHaier.ratelimit import RateLimit  # noqa: E402
+from pyHaier.transport import CloudTransport, Transport  # noqa: E402
+from mock_server import MockHaierCloud  # noqa: E402
+
+SCHEMA_VERSION = 1
+ACCESS_TOKEN = "benchmark"
+DEFAULT_SIZES = (1, 10, 100, 1000)
+UNLIMITED = RateLimit(requests_per_minute=1e9, burst=10**9)
+
+
+class BenchmarkClient(HaierClient):
+    async def async_get_access_token(self) -> str:
+        return ACCESS_TOKEN
+
+
+class TimedTransport(Transport):
+    """Count requests and record their latency as seen by the client."""
+
+    def __init__(self, transport: Transport) -> None:
+        self._transport = transport
+        self.latencies: list[float] = []
+
+    async def post(self, api_path, headers, data) -> bytes:
+        started_at = time.perf_counter()
+        try:
+            return await self._transport.post(api_path, headers, data)
+        finally:
+            self.latencies.append(time.perf_counter() - started_at)
+
+
+def _serve(fleet_size: int, latency: float, conn) -> None:
+    async def serve():
+        cloud = MockHaierCloud(fleet_size, latency=latency, access_token=ACCESS_TOKEN)
+        conn.send(await cloud.start())
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+def _percentile(values: list[float], percent: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, round(percent / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def _run_scenario(
+    name: str, base_url: str, cycles: int, concurrency: int
+) -> dict[str, Any]:
+    async with ClientSession() as session:
+        transport = TimedTransport(CloudTransport(session, base_url))
+        client = BenchmarkClient(
+            session,
+            transport=transport,
+            rate_limits={bucket: UNLIMITED for bucket in DEFAULT_RATE_LIMITS},
+            max_concurrent_fetches=concurrency,
+            max_in_flight=concurrency,
+        )
+        # Warm up the connection pool and the device list outside the timing
+        await client.refresh_confs()
+        devices = create_devices(client, client.device_confs)
+        transport.latencies.clear()
+
+        async def cycle():
+            nonlocal devices
+            if name == "get_devices":
+                await client.update_confs(force=True)
+                devices = await get_devices(session, client)
+            elif name == "coordinator_cycle":
+                await client.update_confs()
+                result = await client.fetch_states(devices)
+                for device in devices:
+                    state = result.states.get(device.device_id)
+                    if state is not None:
+                        device.update_from_report(state)
+            else:
+                await asyncio.gather(*(device.update() for device in devices))
+
+        cycle_times = []
+        cpu_started_at = time.process_time()
+        for _ in range(cycles):
+            started_at = time.perf_counter()
+            await cycle()
+            cycle_times.append(time.perf_counter() - started_at)
+        cpu_time = time.process_time() - cpu_started_at
+        latencies = list(transport.latencies)
+
+        # Memory is traced in an extra cycle, tracing slows the timed ones
+        tracemalloc.start()
+        await cycle()
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "scenario": name,
+        "devices": len(devices),
+        "cycles": cycles,
+        "requests_per_cycle": len(latencies) / cycles,
+        "cycle_time_s": {
+            "mean": statistics.mean(cycle_times),
+            "max": max(cycle_times),
+        },
+        "latency_ms": {
+            "p50": _ms(_percentile(latencies, 50)),
+            "p99": _ms(_percentile(latencies, 99)),
+        },
+        "cpu_time_s_per_cycle": cpu_time / cycles,
+        "peak_memory_kib": peak_memory / 1024,
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else seconds * 1000
+
+
+def run(
+    sizes=DEFAULT_SIZES,
+    scenarios=("get_devices", "coordinator_cycle", "device_update"),
+    cycles: int = 3,
+    latency: float = 0.0,
+    concurrency: int = 10,
+) -> dict[str, Any]:
+    results = []
+    for size in sizes:
+        parent_conn, child_conn = multiprocessing.Pipe()
+        server = multiprocessing.Process(
+            target=_serve, args=(size, latency, child_conn), daemon=True
+        )
+        server.start()
+        try:
+            base_url = parent_conn.recv()
+            for name in scenarios:
+                result = asyncio.run(
+                    _run_scenario(name, base_url, cycles, concurrency)
+                )
+                print(
+                    f"{name:>18} {size:>5} devices: "
+                    f"{result['requests_per_cycle']:>7.1f} req/cycle "
+                    f"{result['cycle_time_s']['mean'] * 1000:>9.1f} ms/cycle",
+                    file=sys.stderr,
+                )
+                results.append(result)
+        finally:
+            server.terminate()
+            server.join()
+
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "parameters": {
+            "cycles": cycles,
+            "server_latency_s": latency,
+            "concurrency": concurrency,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        default=["get_devices", "coordinator_cycle", "device_update"],
+        choices=["get_devices", "coordinator_cycle", "device_update"],
+    )
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="server latency in seconds"
+    )
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report = run(
+        args.sizes, args.scenarios, args.cycles, args.latency, args.concurrency
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
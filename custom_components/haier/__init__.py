@@ -5,13 +5,14 @@ import asyncio
 from datetime import timedelta
 from http import HTTPStatus
 import logging
+import time
 from typing import Any
 
 from aiohttp import ClientConnectionError, ClientSession
 from async_timeout import timeout
 
 from .oauth_impl import HaierOauth2Implementation
-from .pyHaier.client import HaierClient
+from .pyHaier.client import HaierClient, LocalHaierClient
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CONF_CLIENT_ID,
@@ -41,8 +42,16 @@ from homeassistant.util import Throttle
 from .api import ConfigEntryHaierClient, OAuth2SessionHaier
 from .config_flow import ConfigFlow
 from .const import DOMAIN, TYPE_LOCAL, TYPE_OAUTH2
-from .pyHaier import get_devices
+from .coordinator import (
+    STORAGE_KEY,
+    STORAGE_VERSION,
+    HaierDataUpdateCoordinator,
+)
+from .pyHaier import create_devices, get_devices
 from .pyHaier.device import Device
+from .pyHaier.exceptions import HaierAuthError, HaierError
+from .pyHaier.push import WebSocketPushTransport
+from .pyHaier.tracker import ConvergenceTracker
 
 # TODO List the platforms that you want to support.
 # For your initial PR, limit it to 1 platform.
@@ -50,7 +59,8 @@ PLATFORMS: list[Platform] = [Platform.CLIMATE]
 
 _LOGGER = logging.getLogger(__name__)
 
-MIN_TIME_BETWEEN_UPDATES = timedelta(seconds=60)
+CONF_UPDATE_INTERVAL = timedelta(minutes=5)
+DEVICE_SET_DEBOUNCE = timedelta(seconds=1)
 
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
@@ -72,26 +82,58 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     # hass.config_entries.async_setup_platforms(entry, PLATFORMS)
     _LOGGER.info("ASYNC Setup entry")
+    setup_started = time.monotonic()
 
-    implementation = (
-        await config_entry_oauth2_flow.async_get_config_entry_implementation(
-            hass, entry
+    session = aiohttp_client.async_get_clientsession(hass)
+    haier_client: HaierClient
+    if entry.data.get(CONF_TYPE) == TYPE_LOCAL:
+        # A bridge on the LAN serves the same API without the cloud round trip
+        haier_client = LocalHaierClient(
+            session, entry.data[CONF_HOST], conf_update_interval=CONF_UPDATE_INTERVAL
+        )
+    else:
+        implementation = (
+            await config_entry_oauth2_flow.async_get_config_entry_implementation(
+                hass, entry
+            )
         )
-    )
 
-    session = aiohttp_client.async_get_clientsession(hass)
-    oauth_session = OAuth2SessionHaier(hass, entry, implementation)
-    haier_client = ConfigEntryHaierClient(session, oauth_session)
+        oauth_session = OAuth2SessionHaier(hass, entry, implementation)
+        haier_client = ConfigEntryHaierClient(
+            session, oauth_session, conf_update_interval=CONF_UPDATE_INTERVAL
+        )
+
+        _LOGGER.info(str(entry.data))
+        token = entry.data["token"]["access_token"]
+        _LOGGER.info("token = " + str(token))
+
+    store = storage.Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry.entry_id))
+    cache = await store.async_load()
 
-    _LOGGER.info(str(entry.data))
-    token = entry.data["token"]["access_token"]
-    _LOGGER.info("token = " + str(token))
+    haier_devices = await haier_devices_setup(hass, session, haier_client, cache)
 
-    haier_devices = await haier_devices_setup(hass, oauth_session, haier_client)
+    coordinator = HaierDataUpdateCoordinator(
+        hass,
+        haier_client,
+        haier_devices,
+        store,
+        lambda confs: haier_devices_from_confs(haier_client, confs),
+    )
 
-    hass.data.setdefault(DOMAIN, {}).update({entry.entry_id: haier_devices})
+    hass.data.setdefault(DOMAIN, {}).update({entry.entry_id: coordinator})
+    if entry.data.get(CONF_TYPE) == TYPE_LOCAL:
+        # The bridge pushes reports as they happen, polling is the fallback
+        entry.async_on_unload(
+            coordinator.async_attach_push(
+                WebSocketPushTransport.for_local_host(session, entry.data[CONF_HOST])
+            )
+        )
     hass.config_entries.async_setup_platforms(entry, PLATFORMS)
 
+    # Entities start from the cache or without state, the status of all
+    # devices is fetched concurrently in the background
+    hass.async_create_task(coordinator.async_initial_refresh(setup_started))
+
     return True
 
 
@@ -103,40 +145,44 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cached devices of a deleted config entry."""
+    store = storage.Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry.entry_id))
+    await store.async_remove()
+
+
 class HaierDevice:
     """Haier Device instance. (Wrapper of pyHaier device)"""
 
-    SCAN_INTERVAL = MIN_TIME_BETWEEN_UPDATES
-
     def __init__(self, device: Device) -> None:
         self.device = device
         self.name = device.device_name
         self._available = True
 
-    # @Throttle(MIN_TIME_BETWEEN_UPDATES)
-    async def async_update(self, **kwargs):
-        """Pull the latest data from haier cloud."""
-        try:
-            _LOGGER.info("Updating device %s", self.name)
-            await self.device.update()
-            self._available = True
-        except ClientConnectionError:
-            _LOGGER.warning("Connection failed for %s", self.name)
+    def apply_fetch_result(
+        self, state: dict[str, Any] | None, error: Exception | None = None
+    ) -> None:
+        """Apply the outcome of a bulk state fetch done by the coordinator."""
+        if error is not None:
+            _LOGGER.warning("Fetching state failed for %s: %r", self.name, error)
             self._available = False
+            return
 
-    async def async_set(self, properties: dict[str, Any]):
-        """Write state changes to the Haier API."""
-        try:
-            await self.device.set(properties)
-            self._available = True
-        except ClientConnectionError:
-            _LOGGER.warning("Connection failed for %s", self.name)
-            self._available = False
+        self.device.update_from_report(state)
+        self._available = True
 
     @property
     def available(self) -> bool:
-        """Return True if entity is available."""
-        return self._available
+        """Return True if entity is available.
+
+        Entities are added before the first status fetch, without a state
+        they would show defaults such as off.
+        """
+        return (
+            self._available
+            and self.device.availiable
+            and self.device.state is not None
+        )
 
     @property
     def device_id(self):
@@ -160,19 +206,34 @@ async def haier_devices_setup(
     hass,
     session: ClientSession,
     haier_client: HaierClient,
+    cache: dict[str, Any] | None = None,
 ) -> list[HaierDevice]:
-    """Query connected devices from haier cloud."""
+    """Query connected devices from haier cloud.
+
+    When a cache from a previous run is given the devices and their last
+    reported state are restored from it without contacting the cloud.
+    """
+    if cache:
+        haier_client.load_confs(cache["device_confs"])
+        wrapped_devices = haier_devices_from_confs(
+            haier_client, haier_client.device_confs
+        )
+        for d in wrapped_devices:
+            if (state := cache["states"].get(d.device_id)) is not None:
+                d.device.restore_state(state)
+        return wrapped_devices
 
     try:
         async with timeout(10):
             all_devices = await get_devices(
                 session,
-                haier_client
-                # session,
-                # conf_update_interval=timedelta(minutes=5),
-                # device_set_debounce=timedelta(seconds=1),
+                haier_client,
+                device_set_debounce=DEVICE_SET_DEBOUNCE,
+                convergence_tracker=ConvergenceTracker(haier_client),
             )
-    except (asyncio.TimeoutError, ClientConnectionError) as ex:
+    except HaierAuthError as ex:
+        raise ConfigEntryAuthFailed() from ex
+    except (asyncio.TimeoutError, ClientConnectionError, HaierError) as ex:
         raise ConfigEntryNotReady() from ex
 
     # wrapped_devices = {}
@@ -183,3 +244,16 @@ async def haier_devices_setup(
     for d in all_devices:
         wrapped_devices.append(HaierDevice(d))
     return wrapped_devices
+
+
+def haier_devices_from_confs(
+    haier_client: HaierClient, confs: list[dict[str, Any]]
+) -> list[HaierDevice]:
+    """Create wrapped devices from device configurations without a request."""
+    all_devices = create_devices(
+        haier_client,
+        confs,
+        device_set_debounce=DEVICE_SET_DEBOUNCE,
+        convergence_tracker=ConvergenceTracker(haier_client),
+    )
+    return [HaierDevice(d) for d in all_devices]
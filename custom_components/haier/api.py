@@ -1,10 +1,23 @@
 """API for Netatmo bound to HASS OAuth."""
+from __future__ import annotations
 
-from aiohttp import ClientSession
+import asyncio
+from http import HTTPStatus
+import logging
+import time
+
+from aiohttp import ClientResponseError, ClientSession
 
 from homeassistant.helpers import config_entry_oauth2_flow
 
 from .pyHaier.client import HaierClient
+from .pyHaier.const import RET_CODE_USER_ILLEGAL
+from .pyHaier.exceptions import HaierAuthError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Start refreshing the token in the background this long before it expires
+TOKEN_REFRESH_MARGIN = 300
 
 
 class OAuth2SessionHaier(config_entry_oauth2_flow.OAuth2Session):
@@ -25,15 +38,69 @@ class ConfigEntryHaierClient(HaierClient):
     def __init__(
         self,
         websession: ClientSession,
-        oauth_session: config_entry_oauth2_flow.OAuth2Session,
+        oauth_session: OAuth2SessionHaier,
+        **kwargs,
     ) -> None:
         """Initialize auth."""
-        super().__init__(websession)
+        super().__init__(websession, **kwargs)
         self._oauth_session = oauth_session
+        self._token_refresh: asyncio.Task | None = None
 
     async def async_get_access_token(self) -> str:
-        """Return a valid access token."""
+        """Return a valid access token.
+
+        An expired token is refreshed before returning. A token that is about
+        to expire is returned as is while a refresh runs in the background.
+        """
         if not self._oauth_session.valid_token:
-            await self._oauth_session.async_ensure_token_valid()
+            await self._async_refresh_token()
+        elif (
+            self._token_refresh is None
+            and self._oauth_session.token["expires_at"] - time.time()
+            < TOKEN_REFRESH_MARGIN
+        ):
+            self._start_token_refresh().add_done_callback(self._log_refresh_error)
 
         return self._oauth_session.token["access_token"]
+
+    async def async_refresh_access_token(
+        self, rejected_token: str | None = None
+    ) -> bool:
+        """Refresh the access token after the cloud rejected it.
+
+        Requests signed with the old token can fail one after another, the
+        token is only refreshed again if it is still the rejected one.
+        """
+        if (
+            rejected_token is None
+            or self._oauth_session.token["access_token"] == rejected_token
+        ):
+            await self._async_refresh_token()
+        return True
+
+    async def _async_refresh_token(self) -> None:
+        """Refresh the token, concurrent callers share one refresh."""
+        await asyncio.shield(self._start_token_refresh())
+
+    def _start_token_refresh(self) -> asyncio.Task:
+        if self._token_refresh is None:
+            self._token_refresh = asyncio.create_task(self._refresh_token())
+        return self._token_refresh
+
+    async def _refresh_token(self) -> None:
+        try:
+            await self._oauth_session.force_refresh_token()
+        except ClientResponseError as ex:
+            if ex.status in (HTTPStatus.BAD_REQUEST, HTTPStatus.UNAUTHORIZED):
+                # The refresh token was revoked, only reauthentication helps
+                raise HaierAuthError(
+                    RET_CODE_USER_ILLEGAL, f"Token refresh rejected: {ex.status}"
+                ) from ex
+            raise
+        finally:
+            self._token_refresh = None
+
+    @staticmethod
+    def _log_refresh_error(task: asyncio.Task) -> None:
+        if not task.cancelled() and (ex := task.exception()) is not None:
+            _LOGGER.warning("Background token refresh failed: %r", ex)
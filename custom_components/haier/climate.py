@@ -1,8 +1,6 @@
 """Platform for climate integration."""
 from __future__ import annotations
-import asyncio
 
-from datetime import timedelta
 from typing import Any
 from homeassistant.components.climate import ClimateEntity
 from homeassistant.components.climate.const import (
@@ -15,11 +13,15 @@ from homeassistant.components.climate.const import (
 from . import HaierDevice
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import ATTR_TEMPERATURE, PRECISION_WHOLE, TEMP_CELSIUS
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 import logging
 from .const import DOMAIN
+from .coordinator import SIGNAL_DEVICES_ADDED, HaierDataUpdateCoordinator
 from .pyHaier.device import HaierAC
+from .pyHaier.state import DeviceState
 from .pyHaier import (
     HVAC_OPERATION_MODE_DRY,
     HVAC_OPERATION_MODE_COOL,
@@ -40,8 +42,6 @@ from .pyHaier import (
     HVAC_TARGET_TEMP,
 )
 
-SCAN_INTERVAL = timedelta(seconds=60)
-
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -66,15 +66,35 @@ HVAC_FAN_SPEED_LOOKUP = {
 }
 ATA_HVAC_FAN_SPEED_LOOKUP = {v: k for k, v in HVAC_FAN_SPEED_LOOKUP.items()}
 
+# Snapshot fields the entity attributes are derived from
+ENTITY_STATE_FIELDS = frozenset(
+    {
+        "on_off_status",
+        "operation_mode",
+        "target_temperature",
+        "room_temperature",
+        "wind_speed",
+        "wind_direction_vertical",
+        "wind_direction_horizontal",
+    }
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up haier cloud device climate based on config_entry."""
-    devices = hass.data[DOMAIN][entry.entry_id]
-    async_add_entities(
-        [HaierClimate(d, d.device) for d in devices],
-        True,
+    coordinator: HaierDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    @callback
+    def async_add_devices(devices: list[HaierDevice]) -> None:
+        async_add_entities([HaierClimate(coordinator, d, d.device) for d in devices])
+
+    async_add_devices(coordinator.devices)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_DEVICES_ADDED.format(entry.entry_id), async_add_devices
+        )
     )
 
     # platform = entity_platform.async_get_current_platform()
@@ -90,7 +110,7 @@ async def async_setup_entry(
     # )
 
 
-class HaierClimate(ClimateEntity):
+class HaierClimate(CoordinatorEntity[HaierDataUpdateCoordinator], ClimateEntity):
 
     _attr_temperature_unit = TEMP_CELSIUS
     _attr_target_temperature_step = PRECISION_WHOLE
@@ -107,18 +127,66 @@ class HaierClimate(ClimateEntity):
     # _attr_swing_modes = [0, 8]
     # _attr_swing_mode = 0
 
-    def __init__(self, device: HaierDevice, hvac_device: HaierAC) -> None:
+    def __init__(
+        self,
+        coordinator: HaierDataUpdateCoordinator,
+        device: HaierDevice,
+        hvac_device: HaierAC,
+    ) -> None:
         """Initialize the climate."""
+        super().__init__(coordinator)
         self.api = device
         self._base_device = self.api.device
         self._device = hvac_device
 
         self._attr_name = device.name
         self._attr_unique_id = self.api.device.device_id
+        self._written_available: bool | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to state changes of the device."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._device.subscribe(self._handle_device_change))
+
+    @callback
+    def _handle_device_change(
+        self, changed: frozenset[str], state: DeviceState | None
+    ) -> None:
+        """Write state when the device reports a relevant change.
+
+        This is the only path that writes new state data.
+        """
+        if not changed & ENTITY_STATE_FIELDS:
+            self.coordinator.write_stats.suppressed += 1
+            return
+        self._async_write_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state if the availability changed.
+
+        Changed state data was already written through the subscription
+        while the device was polled. A poll that changed nothing is counted
+        as a suppressed write, devices not polled in the cycle are skipped.
+        """
+        if self.available != self._written_available:
+            self._async_write_state()
+        elif (
+            self._base_device.device_id in self.coordinator.polled_device_ids
+            and not self._base_device.changed_fields
+        ):
+            self.coordinator.write_stats.suppressed += 1
 
-    async def async_update(self):
-        """Update state from cloud."""
-        await self.api.async_update()
+    @callback
+    def _async_write_state(self) -> None:
+        self._written_available = self.available
+        self.coordinator.write_stats.emitted += 1
+        self.async_write_ha_state()
+
+    @property
+    def available(self) -> bool:
+        """Return True if the coordinator and the device are available."""
+        return super().available and self.api.available
 
     @property
     def device_info(self):
@@ -180,9 +248,7 @@ class HaierClimate(ClimateEntity):
         """Set new target hvac mode."""
         set_dict = {}
         self._apply_set_hvac_mode(hvac_mode, set_dict)
-        await self._device.set(set_dict)
-        await asyncio.sleep(5)
-        self._force_update_entity()
+        await self._async_set(set_dict)
 
     @property
     def hvac_modes(self) -> list[HVACMode]:
@@ -214,7 +280,7 @@ class HaierClimate(ClimateEntity):
             set_dict[HVAC_TARGET_TEMP] = int(kwargs.get(ATTR_TEMPERATURE))
 
         if set_dict:
-            await self._device.set(set_dict)
+            await self._async_set(set_dict)
 
     @property
     def fan_mode(self) -> str | None:
@@ -223,7 +289,7 @@ class HaierClimate(ClimateEntity):
 
     async def async_set_fan_mode(self, fan_mode: str) -> None:
         """Set new target fan mode."""
-        await self._device.set(
+        await self._async_set(
             {HVAC_WIND_SPEED: ATA_HVAC_FAN_SPEED_LOOKUP.get(fan_mode)}
         )
 
@@ -305,15 +371,15 @@ class HaierClimate(ClimateEntity):
                 HVAC_WIND_DIRECTION_VERTICAL: HVAC_WIND_DIRECTION_VERTICAL_AUTO,
             }
 
-        await self._device.set(set_dict)
+        await self._async_set(set_dict)
 
     async def async_turn_on(self) -> None:
         """Turn the entity on."""
-        await self._device.set({"onOffStatus": True})
+        await self._async_set({"onOffStatus": True})
 
     async def async_turn_off(self) -> None:
         """Turn the entity off."""
-        await self._device.set({"onOffStatus": False})
+        await self._async_set({"onOffStatus": False})
 
     @property
     def min_temp(self) -> float:
@@ -332,5 +398,10 @@ class HaierClimate(ClimateEntity):
 
         return DEFAULT_MAX_TEMP
 
-    def _force_update_entity(self):
-        self.async_schedule_update_ha_state(True)
+    async def _async_set(self, properties: dict[str, Any]) -> None:
+        """Send properties to the device.
+        The device applies them right away as pending values, which reaches
+        the entity through its state subscription.
+        """
+        await self._device.set(properties)
+        await self.coordinator.async_notify_command(self.api.device_id)
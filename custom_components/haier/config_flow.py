@@ -1,9 +1,12 @@
 """Config flow for Haier integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
+from aiohttp import ClientError
+from async_timeout import timeout
 from yarl import URL
 
 from homeassistant import config_entries, core, data_entry_flow
@@ -13,6 +16,8 @@ from homeassistant.helpers import aiohttp_client, config_entry_oauth2_flow
 
 from .const import DOMAIN, TYPE_LOCAL, TYPE_OAUTH2
 from .oauth_impl import HaierOauth2Implementation
+from .pyHaier.client import LocalHaierClient
+from .pyHaier.exceptions import HaierError
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -21,6 +26,13 @@ async def async_verify_local_connection(hass: core.HomeAssistant, host: str):
     """Verify that a local connection works."""
     websession = aiohttp_client.async_get_clientsession(hass)
     # _LOGGER.info("async_verify_local")
+    client = LocalHaierClient(websession, host)
+    try:
+        async with timeout(10):
+            await client.refresh_confs()
+    except (asyncio.TimeoutError, ClientError, HaierError) as ex:
+        _LOGGER.warning("Unable to connect to %s: %r", host, ex)
+        return False
     return True
 
 
@@ -0,0 +1,311 @@
+"""Data update coordinator for the Haier integration."""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+from aiohttp import ClientError
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import DOMAIN
+from .pyHaier import diff_device_confs, sync_device_confs
+from .pyHaier.client import RATE_LIMIT_STATUS, HaierClient
+from .pyHaier.exceptions import HaierAuthError, HaierCircuitOpenError, HaierError
+from .pyHaier.push import PushSubscriber, PushTransport
+from .pyHaier.scheduler import PollScheduler
+
+if TYPE_CHECKING:
+    from . import HaierDevice
+
+_LOGGER = logging.getLogger(__name__)
+
+MIN_TIME_BETWEEN_UPDATES = timedelta(seconds=60)
+FAST_UPDATE_INTERVAL = timedelta(seconds=10)
+SLOW_UPDATE_INTERVAL = timedelta(minutes=5)
+POLL_JITTER = timedelta(seconds=2)
+MIN_REFRESH_DELAY = timedelta(seconds=1)
+# Wait before refreshing the device list again after it failed
+CONFS_RETRY_DELAY = timedelta(seconds=60)
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.{{}}"
+STORAGE_SAVE_DELAY = 30
+# Dispatched with the list of HaierDevice discovered for a config entry
+SIGNAL_DEVICES_ADDED = f"{DOMAIN}_devices_added_{{}}"
+
+
+class StateWriteStats:
+    """Count entity state writes emitted and suppressed as no-ops."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.emitted = 0
+        self.suppressed = 0
+
+
+class HaierDataUpdateCoordinator(DataUpdateCoordinator[None]):
+    """Poll every device of one Haier account in a single cycle.
+
+    The device list is fetched once per cycle, then the status of the online
+    devices that are due according to the poll scheduler is fetched
+    concurrently and the entities are notified together. The next cycle is
+    scheduled for the moment the next device becomes due.
+
+    With a push stream attached, pushed reports update the devices directly
+    and polling slows down to a safety net until the stream drops.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        haier_client: HaierClient,
+        devices: list[HaierDevice],
+        store: Store,
+        device_factory: Callable[[list[dict[str, Any]]], list[HaierDevice]],
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=MIN_TIME_BETWEEN_UPDATES,
+        )
+        self.haier_client = haier_client
+        self.devices = devices
+        self._device_factory = device_factory
+        self._synced_confs = haier_client.device_confs
+        self._confs_retry_at = 0.0
+        # Devices missing from the last device list, retired if still missing
+        self._missing_device_ids: set[str] = set()
+        self.write_stats = StateWriteStats()
+        # Devices whose state was fetched in the last cycle
+        self.polled_device_ids: frozenset[str] = frozenset()
+        self.store = store
+        self._save_pending = False
+        # What the cache holds, devices start from it
+        self._saved_confs = haier_client.device_confs
+        self._saved_states = {
+            device.device_id: device.device.reported_state for device in devices
+        }
+        self.time_to_ready: float | None = None
+        self.scheduler = PollScheduler(
+            fast_interval=FAST_UPDATE_INTERVAL,
+            normal_interval=MIN_TIME_BETWEEN_UPDATES,
+            slow_interval=SLOW_UPDATE_INTERVAL,
+            # Polls share the status bucket, more would only queue in it
+            max_polls_per_minute=int(
+                haier_client.rate_limits[RATE_LIMIT_STATUS].requests_per_minute
+            ),
+            jitter=POLL_JITTER,
+        )
+        self.push: PushSubscriber | None = None
+
+    async def async_initial_refresh(self, setup_started: float) -> None:
+        """Run the first refresh and log the time from setup start to ready."""
+        await self.async_refresh()
+        self.time_to_ready = time.monotonic() - setup_started
+        _LOGGER.info(
+            "Haier entry ready in %.2fs with %d devices (first refresh %s)",
+            self.time_to_ready,
+            len(self.devices),
+            "succeeded" if self.last_update_success else "failed",
+        )
+
+    def async_attach_push(self, transport: PushTransport) -> Callable[[], None]:
+        """Subscribe to pushed device reports, return a callback to stop."""
+        self.push = PushSubscriber(
+            transport, self._find_device, self._async_push_connection_changed
+        )
+        self.push.start()
+        return self.push.stop
+
+    def _find_device(self, device_id: str):
+        return next(
+            (d.device for d in self.devices if d.device_id == device_id), None
+        )
+
+    def _async_push_connection_changed(self, connected: bool) -> None:
+        _LOGGER.info(
+            "Push stream %s", "connected" if connected else "down, polling instead"
+        )
+        self.scheduler.set_push_active(connected)
+        if not connected:
+            # Re-arm the refresh timer for the normal polling schedule
+            self.hass.async_create_task(self.async_request_refresh())
+
+    async def async_notify_command(self, device_id: str) -> None:
+        """Poll a device fast for a while after a command was sent to it.
+
+        Devices with a convergence tracker are already re-read until they
+        apply the command, fast polls would only repeat those reads.
+        """
+        device = self._find_device(device_id)
+        if device is not None and device.tracks_convergence:
+            return
+        self.scheduler.notify_command(device_id)
+        # Re-arm the refresh timer for the new schedule
+        await self.async_request_refresh()
+
+    async def _async_update_data(self) -> None:
+        """Fetch device list once, then the state of every due device."""
+        self.polled_device_ids = frozenset()
+        if time.monotonic() >= self._confs_retry_at:
+            try:
+                await self.haier_client.update_confs()
+            except HaierAuthError as ex:
+                raise ConfigEntryAuthFailed(str(ex)) from ex
+            except (asyncio.TimeoutError, ClientError, HaierError) as ex:
+                if not self.haier_client.device_confs:
+                    raise UpdateFailed(
+                        f"Error communicating with Haier cloud: {ex}"
+                    ) from ex
+                # The cached list keeps the devices polled, retry it later
+                _LOGGER.warning("Refreshing the device list failed: %r", ex)
+                self._confs_retry_at = (
+                    time.monotonic() + CONFS_RETRY_DELAY.total_seconds()
+                )
+
+        # device_confs is replaced by a new list on every refresh
+        if self.haier_client.device_confs is not self._synced_confs:
+            self._synced_confs = self.haier_client.device_confs
+            self._sync_devices(self._synced_confs)
+
+        # Devices the list reports offline are unavailable without a status fetch
+        online = [d for d in self.devices if d.device.availiable]
+        due = self.scheduler.due(online)
+        result = await self.haier_client.fetch_states([d.device for d in due])
+        for device in due:
+            device.apply_fetch_result(
+                result.states.get(device.device_id),
+                result.errors.get(device.device_id),
+            )
+            self.scheduler.record_poll(device.device)
+        self.polled_device_ids = frozenset(device.device_id for device in due)
+        self._update_refresh_interval()
+        self._async_schedule_save()
+
+        await self._async_check_account_failure(due, result.errors)
+
+    async def _async_check_account_failure(
+        self, due: list[HaierDevice], errors: dict[str, Exception]
+    ) -> None:
+        """Fail the cycle only for failures of the whole account.
+
+        A device that fails on its own is marked unavailable by
+        apply_fetch_result, failing the cycle would take down every entity.
+        """
+        if not due or len(errors) < len(due):
+            return
+        error = next(
+            (ex for ex in errors.values() if isinstance(ex, HaierCircuitOpenError)),
+            None,
+        )
+        if error is not None:
+            raise UpdateFailed(f"Error communicating with Haier cloud: {error}")
+        if all(isinstance(ex, HaierAuthError) for ex in errors.values()):
+            # A device can be rejected on its own (e.g. it left the user),
+            # the device list tells whether the token is rejected for all
+            try:
+                await self.haier_client.update_confs(force=True)
+            except HaierAuthError as ex:
+                raise ConfigEntryAuthFailed(str(ex)) from ex
+            except (asyncio.TimeoutError, ClientError, HaierError):
+                pass
+
+    def _sync_devices(self, confs: list[dict[str, Any]]) -> None:
+        """Apply a refreshed device list to the devices of the entry.
+
+        Existing devices are updated in place and keep their state, devices
+        new to the account are created and announced to the platforms and
+        devices missing from two lists in a row are retired.
+        """
+        back_online = sync_device_confs([d.device for d in self.devices], confs)
+        for device in back_online:
+            _LOGGER.info("%s is back online", device.device_name)
+            self.scheduler.probe(device.device_id)
+
+        new_confs, removed = diff_device_confs(
+            [d.device for d in self.devices], confs
+        )
+        # A device is only retired once two lists in a row miss it, one
+        # partial list must not remove devices with their customizations
+        removed_ids = {device.device_id for device in removed}
+        if retired_ids := removed_ids & self._missing_device_ids:
+            self._retire_devices(retired_ids)
+        self._missing_device_ids = removed_ids - retired_ids
+        if new_confs:
+            new_devices = self._device_factory(new_confs)
+            _LOGGER.info("Discovered %s", ", ".join(d.name for d in new_devices))
+            self.devices.extend(new_devices)
+            async_dispatcher_send(
+                self.hass,
+                SIGNAL_DEVICES_ADDED.format(self.config_entry.entry_id),
+                new_devices,
+            )
+
+    def _retire_devices(self, device_ids: set[str]) -> None:
+        """Drop devices that are no longer on the account.
+
+        Removing them from the device registry also removes their entities.
+        """
+        device_registry = dr.async_get(self.hass)
+        for device in [d for d in self.devices if d.device_id in device_ids]:
+            _LOGGER.info("%s was removed from the account", device.name)
+            self.devices.remove(device)
+            self.scheduler.forget(device.device_id)
+            if registry_entry := device_registry.async_get_device(
+                {(DOMAIN, device.device_id)}
+            ):
+                device_registry.async_remove_device(registry_entry.id)
+
+    def _update_refresh_interval(self) -> None:
+        delay = self.scheduler.time_until_next(
+            [d.device for d in self.devices if d.device.availiable]
+        )
+        self.update_interval = max(timedelta(seconds=delay), MIN_REFRESH_DELAY)
+
+    def _async_schedule_save(self) -> None:
+        """Save the cache once the device list or a reported state changed.
+
+        The store re-arms its delay on every call, so no save is scheduled
+        while one is pending.
+        """
+        if not self._save_pending and self._cache_changed():
+            self._save_pending = True
+            self.store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+
+    def _cache_changed(self) -> bool:
+        confs = self.haier_client.device_confs
+        if confs is not self._saved_confs and confs != self._saved_confs:
+            return True
+        for device in self.devices:
+            # Every report is a new snapshot, only compare replaced ones
+            state = device.device.reported_state
+            saved = self._saved_states.get(device.device_id)
+            if state is not saved and state != saved:
+                return True
+        return False
+
+    def _data_to_store(self) -> dict[str, Any]:
+        """Return the device list and last reported states to persist."""
+        self._save_pending = False
+        self._saved_confs = self.haier_client.device_confs
+        self._saved_states = {
+            device.device_id: device.device.reported_state for device in self.devices
+        }
+        return {
+            "device_confs": self.haier_client.device_confs,
+            "states": {
+                device.device_id: device.device.reported_state.as_dict()
+                for device in self.devices
+                if device.device.reported_state is not None
+            },
+        }
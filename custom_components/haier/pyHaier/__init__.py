@@ -1,18 +1,75 @@
-from typing import List
+from datetime import timedelta
+from typing import List, Optional
 
 from aiohttp import ClientSession
 
 from .client import HaierClient
 from .const import *
 from .device import *
+from .tracker import ConvergenceTracker
 
 
-async def get_devices(client: ClientSession, haier_client: HaierClient) -> list[Device]:
+async def get_devices(
+    client: ClientSession,
+    haier_client: HaierClient,
+    device_set_debounce: timedelta = DEFAULT_SET_DEBOUNCE,
+    convergence_tracker: Optional[ConvergenceTracker] = None,
+) -> list[Device]:
     _client = haier_client
     await _client.update_confs()
 
+    return create_devices(
+        _client, _client.device_confs, device_set_debounce, convergence_tracker
+    )
+
+
+def create_devices(
+    haier_client: HaierClient,
+    confs: list[dict],
+    device_set_debounce: timedelta = DEFAULT_SET_DEBOUNCE,
+    convergence_tracker: Optional[ConvergenceTracker] = None,
+) -> list[Device]:
+    """Create devices of supported types from device_confs, without a request."""
     devices = []
-    for conf in _client.device_confs:
+    for conf in confs:
         if conf["deviceType"] == DEVICE_TYPE_HVAC:
-            devices.append(HaierAC(conf, _client))
+            devices.append(
+                HaierAC(
+                    conf,
+                    haier_client,
+                    device_set_debounce,
+                    convergence_tracker=convergence_tracker,
+                )
+            )
     return devices
+
+
+def sync_device_confs(devices: list[Device], confs: list[dict]) -> list[Device]:
+    """Apply refreshed device_confs to existing devices in place.
+    Return the devices that came back online.
+    """
+    confs_by_id = {conf.get("deviceId"): conf for conf in confs}
+    back_online = []
+    for device in devices:
+        conf = confs_by_id.get(device.device_id)
+        if conf is not None and device.update_conf(conf):
+            back_online.append(device)
+    return back_online
+
+
+def diff_device_confs(
+    devices: list[Device], confs: list[dict]
+) -> tuple[list[dict], list[Device]]:
+    """Compare devices with a refreshed device_confs list by deviceId.
+    Return the confs of new supported devices and the devices that are gone.
+    """
+    known_ids = {device.device_id for device in devices}
+    conf_ids = {conf.get("deviceId") for conf in confs}
+    new_confs = [
+        conf
+        for conf in confs
+        if conf.get("deviceId") not in known_ids
+        and conf.get("deviceType") == DEVICE_TYPE_HVAC
+    ]
+    removed = [device for device in devices if device.device_id not in conf_ids]
+    return new_confs, removed
@@ -0,0 +1,193 @@
+""" Record and replay Haier API traffic """
+import asyncio
+import json
+import time
+from typing import Any, Optional
+
+from aiohttp import (
+    ClientConnectionError,
+    ClientError,
+    ClientResponseError,
+    RequestInfo,
+)
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from .transport import Transport
+
+CASSETTE_VERSION = 1
+REDACTED = "REDACTED"
+# Header and JSON body keys holding secrets, compared case-insensitively
+DEFAULT_REDACT_KEYS = frozenset(
+    {
+        "accesstoken",
+        "refreshtoken",
+        "access_token",
+        "refresh_token",
+        "authorization",
+        "sign",
+        "appkey",
+        "clientid",
+        "client_secret",
+        "systemid",
+    }
+)
+
+ERROR_STATUS = "status"
+ERROR_TIMEOUT = "timeout"
+ERROR_CONNECTION = "connection"
+
+
+class CassetteError(LookupError):
+    """A replayed request has no recorded interaction left."""
+
+
+def _redact(value: Any, keys: frozenset[str]) -> Any:
+    if isinstance(value, dict):
+        return {
+            k: REDACTED if k.lower() in keys else _redact(v, keys)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [_redact(v, keys) for v in value]
+    return value
+
+
+def _redact_body(body: Optional[bytes], keys: frozenset[str]) -> Optional[str]:
+    if body is None:
+        return None
+    text = body.decode()
+    try:
+        decoded = json.loads(text)
+    except ValueError:
+        return text
+    # Keep the encoding of bodies without secrets, replay matches on it
+    redacted = _redact(decoded, keys)
+    return text if redacted == decoded else json.dumps(redacted)
+
+
+def load_cassette(path: str) -> dict[str, Any]:
+    with open(path, encoding="utf-8") as file:
+        cassette = json.load(file)
+    if cassette.get("version") != CASSETTE_VERSION:
+        raise ValueError(f"unsupported cassette version {cassette.get('version')}")
+    return cassette
+
+
+class RecordingTransport(Transport):
+    """Pass requests on to a transport and record every request/response
+    pair, with its timing and failure, secrets redacted:
+
+        recorder = RecordingTransport(CloudTransport(session))
+        client = ConfigEntryHaierClient(session, oauth_session, transport=recorder)
+        ...
+        recorder.save("cassette.json")
+    """
+
+    def __init__(
+        self, transport: Transport, redact_keys: frozenset[str] = DEFAULT_REDACT_KEYS
+    ) -> None:
+        self._transport = transport
+        self._redact_keys = frozenset(key.lower() for key in redact_keys)
+        self._started_at = time.monotonic()
+        self.interactions: list[dict[str, Any]] = []
+
+    async def post(
+        self, api_path: str, headers: dict[str, str], data: Optional[bytes]
+    ) -> bytes:
+        interaction: dict[str, Any] = {
+            "offset": time.monotonic() - self._started_at,
+            "api_path": api_path,
+            "request_headers": _redact(headers, self._redact_keys),
+            "request_body": _redact_body(data, self._redact_keys),
+        }
+        started_at = time.monotonic()
+        try:
+            body = await self._transport.post(api_path, headers, data)
+        except ClientResponseError as ex:
+            interaction["error"] = {"type": ERROR_STATUS, "status": ex.status}
+            raise
+        except asyncio.TimeoutError:
+            interaction["error"] = {"type": ERROR_TIMEOUT}
+            raise
+        except ClientError:
+            interaction["error"] = {"type": ERROR_CONNECTION}
+            raise
+        else:
+            interaction["response_body"] = _redact_body(body, self._redact_keys)
+            return body
+        finally:
+            interaction["duration"] = time.monotonic() - started_at
+            self.interactions.append(interaction)
+
+    @property
+    def cassette(self) -> dict[str, Any]:
+        return {"version": CASSETTE_VERSION, "interactions": self.interactions}
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.cassette, file, indent=1)
+
+
+class ReplayTransport(Transport):
+    """Answer requests from a cassette instead of the network.
+    Each request is matched to the first unused interaction with the same
+    API path and body, or only the same API path with match_body=False,
+    and raises CassetteError when none is left. Recorded failures are
+    raised again. Responses take their recorded duration times
+    time_scale: 1 keeps the original timing, 0.1 compresses it tenfold and
+    0 answers at once.
+    """
+
+    def __init__(
+        self,
+        cassette: dict[str, Any],
+        time_scale: float = 1.0,
+        match_body: bool = True,
+    ) -> None:
+        self._interactions = list(cassette["interactions"])
+        self._used = [False] * len(self._interactions)
+        self._time_scale = time_scale
+        self._match_body = match_body
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "ReplayTransport":
+        return cls(load_cassette(path), **kwargs)
+
+    @property
+    def remaining(self) -> int:
+        """Return the number of interactions not replayed yet."""
+        return self._used.count(False)
+
+    def _match(self, api_path: str, data: Optional[bytes]) -> dict[str, Any]:
+        body = None if data is None else data.decode()
+        for index, interaction in enumerate(self._interactions):
+            if self._used[index] or interaction["api_path"] != api_path:
+                continue
+            if self._match_body and interaction["request_body"] != body:
+                continue
+            self._used[index] = True
+            return interaction
+        raise CassetteError(f"no recorded interaction left for {api_path} {body}")
+
+    async def post(
+        self, api_path: str, headers: dict[str, str], data: Optional[bytes]
+    ) -> bytes:
+        interaction = self._match(api_path, data)
+        if self._time_scale:
+            await asyncio.sleep(interaction["duration"] * self._time_scale)
+
+        error = interaction.get("error")
+        if error is None:
+            return interaction["response_body"].encode()
+        if error["type"] == ERROR_TIMEOUT:
+            raise asyncio.TimeoutError()
+        if error["type"] == ERROR_STATUS:
+            url = URL(api_path)
+            raise ClientResponseError(
+                RequestInfo(url, "POST", CIMultiDictProxy(CIMultiDict()), url),
+                (),
+                status=error["status"],
+                message="replayed",
+            )
+        raise ClientConnectionError("replayed connection error")
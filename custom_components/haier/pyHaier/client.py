@@ -1,15 +1,27 @@
 """ Haier API Access """
 from abc import abstractmethod
-from datetime import datetime
+import asyncio
+from datetime import datetime, timedelta
 import hashlib
 import json
-from typing import Any, Optional
+import time
+from typing import Any, Callable, Iterable, NamedTuple, Optional, Union
 import logging
-from aiohttp import ClientSession, web
+from aiohttp import ClientSession
 from .const import *
+from .exceptions import HaierApiError, HaierAuthError
+from .priority import DEFAULT_AGING, PrioritySemaphore
+from .ratelimit import RateLimit, RateLimitStats, TokenBucket
+from .resilience import (
+    DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+    DEFAULT_CIRCUIT_RESET_TIMEOUT,
+    CircuitBreaker,
+    RetryPolicy,
+    is_retryable,
+)
+from .transport import BASE_URL, CloudTransport, LocalTransport, Transport
 import itertools
 
-BASE_URL = "https://uws-sea.haieriot.net"
 API_DIR = "/dcs/third-party-cloud/"
 
 # API_PORT
@@ -18,24 +30,110 @@ DEVICE_DETAIL_API = "get/device/detail"
 DEVICE_STATUS_API = "get/device/status"
 DEVICE_CONTROL_API = "update/device/cmd"
 
+DEFAULT_CONF_UPDATE_INTERVAL = timedelta(minutes=5)
+DEFAULT_MAX_CONCURRENT_FETCHES = 10
+DEFAULT_FETCH_TIMEOUT = timedelta(seconds=10)
+DEFAULT_MAX_IN_FLIGHT = 10
+
+RATE_LIMIT_LIST = "list"
+RATE_LIMIT_STATUS = "status"
+RATE_LIMIT_CONTROL = "control"
+DEFAULT_RATE_LIMITS = {
+    RATE_LIMIT_LIST: RateLimit(requests_per_minute=6, burst=2),
+    RATE_LIMIT_STATUS: RateLimit(requests_per_minute=120, burst=20),
+    RATE_LIMIT_CONTROL: RateLimit(requests_per_minute=30, burst=5),
+}
+_API_RATE_LIMIT = {
+    DEVICE_LIST_API: RATE_LIMIT_LIST,
+    DEVICE_STATUS_API: RATE_LIMIT_STATUS,
+    DEVICE_CONTROL_API: RATE_LIMIT_CONTROL,
+}
+
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def compact_json_dumps(obj: Any) -> str:
+    """Encode obj as canonical compact JSON, the form the request sign covers."""
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def calculate_sign(api_path: str, timestamp: Union[int, str], body: bytes) -> str:
+    """Return the sign of a request, body is the encoded body as sent."""
+    sign = (
+        api_path.encode() + body + (SYSTEM_ID + SYSTEM_KEY + str(timestamp)).encode()
+    )
+    return hashlib.sha256(sign).hexdigest()
+
+
+class FetchStatesResult(NamedTuple):
+    """Result of HaierClient.fetch_states, keyed by device id."""
+
+    states: dict[str, Optional[dict[str, Any]]]
+    errors: dict[str, Exception]
+
+
 class HaierClient:
-    def __init__(self, session: ClientSession):
+    def __init__(
+        self,
+        session: ClientSession,
+        conf_update_interval: timedelta = DEFAULT_CONF_UPDATE_INTERVAL,
+        max_concurrent_fetches: int = DEFAULT_MAX_CONCURRENT_FETCHES,
+        fetch_timeout: timedelta = DEFAULT_FETCH_TIMEOUT,
+        retry_policy: RetryPolicy = RetryPolicy(),
+        retryable_ret_codes: frozenset[str] = RETRYABLE_RET_CODES,
+        circuit_failure_threshold: int = DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+        circuit_reset_timeout: timedelta = DEFAULT_CIRCUIT_RESET_TIMEOUT,
+        rate_limits: Optional[dict[str, RateLimit]] = None,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        priority_aging: timedelta = DEFAULT_AGING,
+        json_dumps: Callable[[Any], Union[str, bytes]] = compact_json_dumps,
+        json_loads: Callable[[bytes], Any] = json.loads,
+        transport: Optional[Transport] = None,
+        base_url: Optional[str] = None,
+    ):
         # self._session = ClientSession()
         self._session = session
+        # base_url points the cloud transport elsewhere, e.g. at tests/mock_server.py
+        self._transport = transport or CloudTransport(session, base_url or BASE_URL)
         self._last_user_update = None
-        self._last_conf_update = None
+        self._last_conf_update: Optional[float] = None
+        self._conf_update_interval = conf_update_interval
+        self._conf_refresh: Optional[asyncio.Task] = None
+        self._max_concurrent_fetches = max_concurrent_fetches
+        self._fetch_timeout = fetch_timeout
         self._device_confs: list[dict[str, Any]] = []
         self._account: Optional[dict[str, Any]] = None
         self._sequence_iter = itertools.count()
+        self._retry_policy = retry_policy
+        self._retryable_ret_codes = retryable_ret_codes
+        self._circuit_breakers = {
+            api: CircuitBreaker(api, circuit_failure_threshold, circuit_reset_timeout)
+            for api in (DEVICE_LIST_API, DEVICE_STATUS_API, DEVICE_CONTROL_API)
+        }
+        self.rate_limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        self._rate_limiters = {
+            name: TokenBucket(name, limit, priority_aging)
+            for name, limit in self.rate_limits.items()
+        }
+        # Requests on the wire, shared by every endpoint
+        self._in_flight = PrioritySemaphore(max_in_flight, priority_aging)
+        # json_dumps must produce compact JSON, e.g. orjson.dumps
+        self._json_dumps = json_dumps
+        self._json_loads = json_loads
 
     @abstractmethod
     async def async_get_access_token(self) -> str:
         """Return a valid access token."""
 
+    async def async_refresh_access_token(
+        self, rejected_token: Optional[str] = None
+    ) -> bool:
+        """Refresh the access token after the cloud rejected rejected_token.
+        Return True if a request should be replayed with the new token.
+        """
+        return False
+
     def _generate_sequence_id(self) -> str:
         sequence_id = str(self.timestamp) + str(next(self._sequence_iter)).rjust(6, "0")
         # _LOGGER.info("sequence id " + str(sequence_id))
@@ -60,86 +158,211 @@ class HaierClient:
             "Content-Type": "application/json",
         }
 
-    def calculate_sign(self, API_PORT: str, timestamp: int, body) -> str:
-        bodyStr = json.dumps(body).replace(" ", "")
-        if bodyStr == '""':
-            bodyStr = ""
+    def encode_body(self, body: Any) -> bytes:
+        """Serialize a request body once, these bytes are signed and sent."""
+        encoded = self._json_dumps(body)
+        return encoded.encode() if isinstance(encoded, str) else encoded
 
-        sign = API_PORT + bodyStr + SYSTEM_ID + SYSTEM_KEY + str(timestamp)
-        # print("Sign = " + sign)
-        return hashlib.sha256(sign.encode()).hexdigest()
+    def calculate_sign(self, API_PORT: str, timestamp: int, body) -> str:
+        """Sign a request. body is the encoded body as sent, "" for none.
+        A body that is not encoded yet is encoded with encode_body first.
+        """
+        if isinstance(body, str):
+            body = body.encode()
+        elif not isinstance(body, bytes):
+            body = self.encode_body(body)
+        return calculate_sign(API_PORT, timestamp, body)
 
     @property
     def timestamp(self) -> int:
         return int(round(datetime.now().timestamp()))
 
+    @property
+    def rate_limit_stats(self) -> dict[str, RateLimitStats]:
+        """Return wait-time metrics of the list, status and control buckets."""
+        return {name: bucket.stats for name, bucket in self._rate_limiters.items()}
+
     @property
     def device_confs(self) -> list[dict[Any, Any]]:
         """Return device configurations."""
         return self._device_confs
 
-    async def update_confs(self):
-        await self._fetch_device_confs()
+    def load_confs(self, device_confs: list[dict[str, Any]]):
+        """Seed device_confs from a cache.
+        They count as expired, the next update_confs() refreshes them.
+        """
+        self._device_confs = device_confs
+        self._last_conf_update = None
 
-    async def _fetch_device_confs(self):
-        """Fetch all configured devices."""
-        url = BASE_URL + API_DIR + DEVICE_LIST_API
-        header = await self.create_header(API_DIR + DEVICE_LIST_API)
-
-        async with self._session.post(
-            url, headers=header, raise_for_status=True
-        ) as resp:
-            respJson = await resp.json()
-            if respJson["retCode"] != RET_CODE_OK:
-                raise web.HTTPUnauthorized(
-                    reason=self.get_error_reason(respJson["retCode"])
+    @property
+    def confs_expired(self) -> bool:
+        """Return True if device_confs are older than conf_update_interval."""
+        if self._last_conf_update is None:
+            return True
+        age = time.monotonic() - self._last_conf_update
+        return age >= self._conf_update_interval.total_seconds()
+
+    async def update_confs(self, force: bool = False):
+        """Refresh device_confs when the cached list has expired.
+        Pass force=True to refresh regardless of the cache age.
+        """
+        if force or self.confs_expired:
+            await self.refresh_confs()
+
+    async def refresh_confs(self):
+        """Refresh device_confs now.
+        Concurrent callers share the same in-flight request.
+        """
+        if self._conf_refresh is None:
+            self._conf_refresh = asyncio.create_task(self._refresh_confs())
+        # Shield so a cancelled caller does not cancel the shared refresh
+        await asyncio.shield(self._conf_refresh)
+
+    async def _refresh_confs(self):
+        try:
+            await self._fetch_device_confs()
+            self._last_conf_update = time.monotonic()
+        finally:
+            self._conf_refresh = None
+
+    async def _request(
+        self, api: str, body=None, priority: int = PRIORITY_BACKGROUND
+    ) -> dict[str, Any]:
+        """Send a request and return the decoded response.
+        Transient failures are retried with backoff, fatal ones are raised
+        right away. Every attempt waits for a token of the endpoint's rate
+        limit bucket and for an in-flight slot, both served by priority so
+        user commands overtake background polls. A rejected token is
+        refreshed and the request replayed once. While the endpoint keeps
+        failing its circuit breaker fails requests fast with
+        HaierCircuitOpenError.
+        """
+        breaker = self._circuit_breakers[api]
+        rate_limiter = self._rate_limiters[_API_RATE_LIMIT[api]]
+        data = None if body is None else self.encode_body(body)
+        attempt = 0
+        replayed = False
+        while True:
+            header = None
+            breaker.before_request()
+            try:
+                await rate_limiter.acquire(priority)
+                async with self._in_flight.slot(priority):
+                    header = await self.create_header(API_DIR + api, data or "")
+                    respJson = await self._send(api, header, data)
+                self._check_ret_code(respJson)
+            except asyncio.CancelledError:
+                breaker.record_cancelled()
+                raise
+            except HaierAuthError:
+                breaker.record_success()
+                # No header means getting the token failed, there is no
+                # request to replay
+                if (
+                    header is None
+                    or replayed
+                    or not await self.async_refresh_access_token(
+                        header["accessToken"]
+                    )
+                ):
+                    raise
+                # Replay once with the refreshed token
+                replayed = True
+            except Exception as ex:
+                if not is_retryable(ex, self._retryable_ret_codes):
+                    # The service answered, only this request is bad
+                    breaker.record_success()
+                    raise
+                breaker.record_failure()
+                attempt += 1
+                if attempt >= self._retry_policy.max_attempts or breaker.is_open:
+                    raise
+                delay = self._retry_policy.delay(attempt - 1)
+                _LOGGER.debug(
+                    "%s failed (%r), retry %d in %.1fs", api, ex, attempt, delay
                 )
+                await asyncio.sleep(delay)
+            else:
+                breaker.record_success()
+                return respJson
 
-            self._device_confs = respJson["payload"]
+    async def _send(
+        self, api: str, header: dict[str, str], data: Optional[bytes] = None
+    ) -> dict[str, Any]:
+        return self._json_loads(
+            await self._transport.post(API_DIR + api, header, data)
+        )
 
-    async def fetch_device_state(self, device) -> Optional[dict[str, Any]]:
+    def _check_ret_code(self, respJson: dict[str, Any]):
+        retCode = respJson["retCode"]
+        if retCode == RET_CODE_OK:
+            return
+        reason = self.get_error_reason(retCode, respJson.get("retInfo", ""))
+        if retCode == RET_CODE_USER_ILLEGAL:
+            raise HaierAuthError(retCode, reason)
+        raise HaierApiError(retCode, reason)
+
+    async def _fetch_device_confs(self):
+        """Fetch all configured devices."""
+        respJson = await self._request(DEVICE_LIST_API)
+        payload = respJson.get("payload")
+        if not payload and self._device_confs:
+            # More likely a glitch than an account whose devices all left
+            _LOGGER.warning("Device list came back empty, keeping the last one")
+            return
+        self._device_confs = payload or []
+
+    async def fetch_device_state(
+        self, device, priority: int = PRIORITY_BACKGROUND
+    ) -> Optional[dict[str, Any]]:
         """Fetch state information of a device.
-        This method should not be called more than once a minute. Rate
-        limiting is left to the caller.
+        The cloud expects a device to be polled about once a minute, the
+        account-wide rate is capped by the status rate limit bucket.
         """
-
-        url = BASE_URL + API_DIR + DEVICE_STATUS_API
         body = {"deviceId": device.device_id, "part": 0}
-        header = await self.create_header(API_DIR + DEVICE_STATUS_API, body)
-        async with self._session.post(
-            url, headers=header, json=body, raise_for_status=True
-        ) as resp:
-            respJson = await resp.json()
-            if respJson["retCode"] != RET_CODE_OK:
-                raise web.HTTPUnauthorized(
-                    reason=self.get_error_reason(respJson["retCode"])
-                )
+        respJson = await self._request(DEVICE_STATUS_API, body, priority)
+        return respJson["payload"]["reported"]
 
-            return respJson["payload"]["reported"]
+    async def fetch_states(
+        self,
+        devices: Iterable,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[timedelta] = None,
+    ) -> FetchStatesResult:
+        """Fetch state information of many devices concurrently.
+        At most max_concurrency requests are in flight at once and every
+        request is bounded by timeout. A failing device does not fail the
+        batch, its exception is returned in errors instead.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self._max_concurrent_fetches)
+        timeout_sec = (timeout or self._fetch_timeout).total_seconds()
+        result = FetchStatesResult({}, {})
+
+        async def fetch(device):
+            async with semaphore:
+                try:
+                    result.states[device.device_id] = await asyncio.wait_for(
+                        self.fetch_device_state(device), timeout_sec
+                    )
+                except Exception as ex:  # pylint: disable=broad-except
+                    result.errors[device.device_id] = ex
+
+        await asyncio.gather(*(fetch(device) for device in devices))
+        return result
 
     async def set_device_state(self, device, properties: dict[str, Any]) -> None:
         """set state information of a device."""
 
-        url = BASE_URL + API_DIR + DEVICE_CONTROL_API
         body = {
             "deviceId": device.device_id,
             "cmdName": "grSetDAC",
             "cmdArgs": properties,
         }
         _LOGGER.info(body)
-        header = await self.create_header(API_DIR + DEVICE_CONTROL_API, body)
-        async with self._session.post(
-            url, headers=header, json=body, raise_for_status=True
-        ) as resp:
-            respJson = await resp.json()
-            if respJson["retCode"] != RET_CODE_OK:
-                raise web.HTTPUnauthorized(
-                    reason=self.get_error_reason(
-                        respJson["retCode"], respJson["retInfo"]
-                    )
-                )
-
-            return respJson["retCode"]
+        respJson = await self._request(
+            DEVICE_CONTROL_API, body, PRIORITY_INTERACTIVE
+        )
+        return respJson["retCode"]
 
     def get_error_reason(self, errorcode, retinfo=""):
         if errorcode == RET_CODE_USER_ILLEGAL:
@@ -147,4 +370,14 @@ class HaierClient:
         elif errorcode == RET_CODE_USER_NOT_MATCH_DEVICE:
             return "The current user does not match the device"
         else:
-            return "Unknown Error : {errorcode} {retinfo}"
+            return f"Unknown Error : {errorcode} {retinfo}"
+
+
+class LocalHaierClient(HaierClient):
+    """Client for a bridge on the LAN, which needs no cloud access token."""
+
+    def __init__(self, session: ClientSession, host: str, **kwargs):
+        super().__init__(session, transport=LocalTransport(session, host), **kwargs)
+
+    async def async_get_access_token(self) -> str:
+        return ""
@@ -10,6 +10,14 @@ DEVICE_TYPE_HVAC = "03001001"
 RET_CODE_USER_ILLEGAL = "D00008"
 RET_CODE_USER_NOT_MATCH_DEVICE = "130004"
 RET_CODE_OK = "00000"
+# retCodes worth retrying. None of the documented codes are transient,
+# clients can extend this through HaierClient(retryable_ret_codes=...).
+RETRYABLE_RET_CODES: frozenset = frozenset()
+
+# Request priority classes, lower is served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_CONFIRM = 1
+PRIORITY_BACKGROUND = 2
 
 
 # Device status interpretation
@@ -1,43 +1,306 @@
 from abc import ABC
-from typing import Any, Optional
+import asyncio
+from datetime import timedelta
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
 
 from .const import *
 
 
 from .client import HaierClient
+from .state import DeviceState, HaierACState
+from .tracker import CommandAck, ConvergenceTracker
+
+DEFAULT_SET_DEBOUNCE = timedelta(0)
+
+# Called with the changed fields and the new state snapshot
+StateListener = Callable[[frozenset[str], Optional[DeviceState]], None]
+# How long an optimistic value survives reports that disagree with it
+DEFAULT_PENDING_TIMEOUT = timedelta(seconds=20)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CommandBuffer:
+    """Merge commands sent to one device into a single cmdArgs payload.
+    Properties submitted within the debounce window (counted from the first
+    submit) are merged, last write wins. Every submitter gets the result of
+    the merged command.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[dict[str, Any]], Awaitable[Any]],
+        debounce: timedelta = DEFAULT_SET_DEBOUNCE,
+    ) -> None:
+        self._send = send
+        self._debounce = debounce.total_seconds()
+        self._pending: dict[str, Any] = {}
+        self._waiters: list[asyncio.Future] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        # Merged commands of one device are sent one after another
+        self._send_lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> dict[str, Any]:
+        """Return properties waiting to be sent."""
+        return dict(self._pending)
+
+    async def submit(self, properties: dict[str, Any]) -> Any:
+        """Queue properties and wait until the merged command completes."""
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._pending.update(properties)
+        self._waiters.append(waiter)
+        if self._timer is None:
+            self._timer = loop.call_later(self._debounce, self._schedule_flush)
+        return await waiter
+
+    def _schedule_flush(self) -> None:
+        self._timer = None
+        self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self) -> None:
+        """Send the pending properties now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        properties, waiters = self._pending, self._waiters
+        self._pending, self._waiters = {}, []
+        if not waiters:
+            return
+
+        async with self._send_lock:
+            try:
+                result = await self._send(properties)
+            except Exception as ex:  # pylint: disable=broad-except
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(ex)
+            else:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(result)
 
 
 class Device(ABC):
-    def __init__(self, device_conf: dict[str, Any], client: HaierClient) -> None:
+    _state_class = DeviceState
+
+    def __init__(
+        self,
+        device_conf: dict[str, Any],
+        client: HaierClient,
+        set_debounce: timedelta = DEFAULT_SET_DEBOUNCE,
+        pending_timeout: timedelta = DEFAULT_PENDING_TIMEOUT,
+        convergence_tracker: Optional[ConvergenceTracker] = None,
+    ) -> None:
         self.device_id = device_conf.get("deviceId")
+        self.update_conf(device_conf)
+
+        self._state: Optional[DeviceState] = None
+        # Fields changed by the latest state update
+        self.changed_fields: frozenset[str] = frozenset()
+        self._listeners: list[StateListener] = []
+        self._reported: Optional[DeviceState] = None
+        # property -> (optimistic parsed value, monotonic time it was applied)
+        self._pending: dict[str, tuple[Any, float]] = {}
+        self._pending_timeout = pending_timeout.total_seconds()
+        self._device_units = None
+        self._client = client
+        self._command_buffer = CommandBuffer(self._send, set_debounce)
+        self._convergence_tracker = convergence_tracker
+        self._track_task: Optional[asyncio.Task] = None
+        self.last_command_ack: Optional[CommandAck] = None
+
+    def update_conf(self, device_conf: dict[str, Any]) -> bool:
+        """Apply a refreshed device configuration in place.
+        Return True if the device came back online.
+        """
+        was_online = getattr(self, "online", None)
         self.device_name = device_conf.get("deviceName")
         self.device_type = device_conf.get("deviceType")
         self.online = device_conf.get("online")
         self.product_code = device_conf.get("productCodeT")
         self.product_name = device_conf.get("productNameT")
         self.permissions = device_conf.get("totalPermission")
-
         self._device_conf = device_conf
-        self._state = None
-        self._device_units = None
-        self._client = client
+        return was_online is not None and not was_online and bool(self.online)
 
     async def update(self):
         """Fetch state of the device from Haier Smart cloud.
-        List of device_confs is also updated.
+        List of device_confs is also updated. The state of a device the list
+        reports offline is not fetched.
         """
         await self._client.update_confs()
-        self._state = await self._client.fetch_device_state(self)
+        for conf in self._client.device_confs:
+            if conf.get("deviceId") == self.device_id:
+                self.update_conf(conf)
+        if self.availiable:
+            await self.update_state()
+
+    async def update_state(self):
+        """Fetch state of the device only, device_confs are left untouched.
+        Used when the caller refreshes device_confs once for many devices.
+        """
+        self.update_from_report(await self._client.fetch_device_state(self))
+
+    def update_from_report(
+        self, reported: Optional[dict[str, Any]]
+    ) -> frozenset[str]:
+        """Apply a reported state that was fetched by the caller.
+        The payload is decoded once into a state snapshot. Pending optimistic
+        values are dropped once the report confirms them, or rolled back
+        once they are older than pending_timeout. Return the changed fields.
+        """
+        if reported is None:
+            self._reported = None
+        else:
+            self._reported = self._state_class.from_reported(reported)
+            if self._reported.errors:
+                _LOGGER.warning(
+                    "%s: could not parse reported values %s",
+                    self.device_id,
+                    self._reported.errors,
+                )
+            now = time.monotonic()
+            for k, (value, applied_at) in list(self._pending.items()):
+                reported_value = getattr(
+                    self._reported, self._state_class.field_name(k)
+                )
+                if reported_value == value:
+                    del self._pending[k]
+                elif now - applied_at >= self._pending_timeout:
+                    _LOGGER.debug(
+                        "%s: rolling back %s=%s, device reports %s",
+                        self.device_id,
+                        k,
+                        value,
+                        reported_value,
+                    )
+                    del self._pending[k]
+        return self._rebuild_state()
+
+    def subscribe(self, listener: StateListener) -> Callable[[], None]:
+        """Call listener whenever the state changes, by a poll, a bulk fetch
+        or an optimistic command. Return a function that unsubscribes.
+        """
+        self._listeners.append(listener)
+
+        def unsubscribe():
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+        return unsubscribe
+
+    def _notify_listeners(self, changed: frozenset[str]):
+        for listener in list(self._listeners):
+            try:
+                listener(changed, self._state)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("%s: error in state listener", self.device_id)
+
+    def restore_state(self, values: dict[str, Any]):
+        """Restore a reported state saved from DeviceState.as_dict()."""
+        self._reported = self._state_class(**values)
+        self._rebuild_state()
+
+    @property
+    def reported_state(self) -> Optional[DeviceState]:
+        """Return the last reported state snapshot, without pending values."""
+        return self._reported
+
+    @property
+    def state(self) -> Optional[DeviceState]:
+        """Return the current state snapshot, including pending values."""
+        return self._state
+
+    @property
+    def pending_properties(self) -> dict[str, Any]:
+        """Return properties that are set locally but not yet confirmed by a report."""
+        return {k: value for k, (value, _) in self._pending.items()}
+
+    def _rebuild_state(self) -> frozenset[str]:
+        old_state = self._state
+        if self._reported is None and not self._pending:
+            self._state = None
+        else:
+            state = self._reported or self._state_class()
+            self._state = state.replace(
+                **{
+                    self._state_class.field_name(k): value
+                    for k, (value, _) in self._pending.items()
+                }
+            )
+
+        if self._state is None:
+            changed = old_state.diff(None) if old_state is not None else frozenset()
+        else:
+            changed = self._state.diff(old_state)
+        self.changed_fields = changed
+        if changed:
+            self._notify_listeners(changed)
+        return changed
+
+    def _apply_optimistic(self, properties: dict[str, Any]) -> dict[str, Any]:
+        now = time.monotonic()
+        applied = {}
+        for k, v in properties.items():
+            if self._state_class.field_name(k) is None:
+                continue
+            try:
+                applied[k] = self._state_class.parse_value(k, str(v).lower())
+            except (TypeError, ValueError):
+                continue
+            self._pending[k] = (applied[k], now)
+        self._rebuild_state()
+        return applied
+
+    def _discard_optimistic(self, applied: dict[str, Any]):
+        for k, value in applied.items():
+            # Keep values of newer commands for the same property
+            if k in self._pending and self._pending[k][0] == value:
+                del self._pending[k]
+        self._rebuild_state()
 
     async def _set(self, properties: dict[str, Any]):
-        await self._client.set_device_state(self, properties)
+        applied = self._apply_optimistic(properties)
+        try:
+            await self._command_buffer.submit(properties)
+        except Exception:
+            self._discard_optimistic(applied)
+            raise
+
+    async def _send(self, properties: dict[str, Any]):
+        sent_at = time.monotonic()
+        result = await self._client.set_device_state(self, properties)
+        if self._convergence_tracker is not None:
+            # A newer command supersedes tracking of the previous one
+            if self._track_task is not None and not self._track_task.done():
+                self._track_task.cancel()
+            self._track_task = asyncio.create_task(
+                self._track_convergence(properties, sent_at)
+            )
+        return result
+
+    async def _track_convergence(self, properties: dict[str, Any], sent_at: float):
+        self.last_command_ack = await self._convergence_tracker.track(
+            self, properties, sent_at
+        )
+
+    @property
+    def tracks_convergence(self) -> bool:
+        """Return True if commands are confirmed by a ConvergenceTracker."""
+        return self._convergence_tracker is not None
 
     @property
     def on_off_status(self) -> Optional[bool]:
         """Return current power setting - True if the device is on, False otherwise."""
         if self._state is None:
             return None
-        return bool(self._state.get(HVAC_ON_OFF_STATUS) == "true")
+        return bool(self._state.on_off_status)
 
     @property
     def availiable(self) -> bool:
@@ -51,6 +314,8 @@ class Device(ABC):
 class HaierAC(Device):
     """Class for Haier Air Conditioning device. Currently supported and Tested with only TH Model device."""
 
+    _state_class = HaierACState
+
     _availiable_modes = [
         HVAC_OPERATION_MODE_COOL,
         HVAC_OPERATION_MODE_DRY,
@@ -106,21 +371,21 @@ class HaierAC(Device):
         """Return current operation mode."""
         if self._state is None:
             return None
-        return int(self._state.get(HVAC_OPERATION_MODE))
+        return self._state.operation_mode
 
     @property
     def target_temperature(self) -> Optional[int]:
         """Return target (set) temperture."""
         if self._state is None:
             return None
-        return int(self._state.get(HVAC_TARGET_TEMP))
+        return self._state.target_temperature
 
     @property
     def room_temperature(self) -> Optional[int]:
         """Return current room temperture."""
         if self._state is None:
             return None
-        return int(self._state.get(HVAC_ROOM_TEMP))
+        return self._state.room_temperature
 
     @property
     def available_wind_speed(self) -> int:
@@ -141,21 +406,21 @@ class HaierAC(Device):
         """Return current horizon wind direction setting"""
         if self._state is None:
             return None
-        return int(self._state.get(HVAC_WIND_DIRECTION_HORIZONTAL))
+        return self._state.wind_direction_horizontal
 
     @property
     def wind_direction_vertical(self) -> Optional[int]:
         """Return current vertical wind direction setting"""
         if self._state is None:
             return None
-        return int(self._state.get(HVAC_WIND_DIRECTION_VERTICAL))
+        return self._state.wind_direction_vertical
 
     @property
     def wind_speed(self) -> Optional[int]:
         """Return current wind speed setting"""
         if self._state is None:
             return None
-        return int(self._state.get(HVAC_WIND_SPEED))
+        return self._state.wind_speed
 
     @property
     def min_target_temp(self):
@@ -0,0 +1,23 @@
+""" Exceptions raised by the Haier API client """
+from aiohttp import ClientConnectionError
+
+
+class HaierError(Exception):
+    """Base class for Haier API errors."""
+
+
+class HaierApiError(HaierError):
+    """The cloud answered with a non-OK retCode."""
+
+    def __init__(self, ret_code: str, reason: str = "") -> None:
+        super().__init__(f"{ret_code}: {reason}")
+        self.ret_code = ret_code
+        self.reason = reason
+
+
+class HaierAuthError(HaierApiError):
+    """The access token was rejected (user illegal / token expired)."""
+
+
+class HaierCircuitOpenError(HaierError, ClientConnectionError):
+    """Requests to an endpoint are suspended after repeated failures."""
@@ -0,0 +1,62 @@
+""" Priority ordering of queued Haier API requests """
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import timedelta
+import heapq
+import itertools
+import time
+
+from .const import PRIORITY_BACKGROUND
+
+# A waiter is promoted by one priority class for every AGING it has waited
+DEFAULT_AGING = timedelta(seconds=5)
+
+
+class PrioritySemaphore:
+    """Semaphore that wakes waiters by priority class instead of arrival.
+    Lower priority values are served first. To prevent starvation a waiter
+    is promoted by one class for every `aging` it has been waiting, which
+    amounts to ordering waiters by enqueue time + priority * aging.
+    """
+
+    def __init__(self, value: int, aging: timedelta = DEFAULT_AGING) -> None:
+        self._value = value
+        self._aging = aging.total_seconds()
+        self._waiters: list[tuple[float, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, fut in self._waiters if not fut.done())
+
+    async def acquire(self, priority: int = PRIORITY_BACKGROUND) -> None:
+        if self._value > 0 and not self.waiting:
+            self._value -= 1
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        key = time.monotonic() + priority * self._aging
+        heapq.heappush(self._waiters, (key, next(self._sequence), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Woken up and cancelled at once, hand the slot on
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self._value += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_BACKGROUND):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
@@ -0,0 +1,144 @@
+""" Pushed device reports with a polling fallback """
+from abc import ABC, abstractmethod
+import asyncio
+from contextlib import asynccontextmanager
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, NamedTuple, Optional
+
+from aiohttp import ClientSession, WSMsgType
+
+from .resilience import RetryPolicy
+
+# Backoff between reconnects, polling covers the devices meanwhile
+DEFAULT_RECONNECT_POLICY = RetryPolicy(max_attempts=0, base_delay=1.0, max_delay=300.0)
+# Backoff stops growing once max_delay is reached
+_MAX_BACKOFF_EXPONENT = 16
+
+# Websocket a LAN bridge pushes reports on
+LOCAL_PUSH_PATH = "/ws"
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PushEvent(NamedTuple):
+    """A state report pushed for one device."""
+
+    device_id: str
+    reported: dict[str, Any]
+
+
+class PushTransport(ABC):
+    """Long-lived stream of device reports."""
+
+    @abstractmethod
+    def subscribe(self):
+        """Return an async context manager that connects the stream and
+        yields an async iterator of PushEvent. The iterator ends or raises
+        when the stream drops.
+        """
+
+
+class WebSocketPushTransport(PushTransport):
+    """Reports pushed as JSON text messages over a websocket:
+    {"deviceId": "...", "reported": {...}}
+    """
+
+    def __init__(
+        self, session: ClientSession, url: str, heartbeat: float = 30
+    ) -> None:
+        self._session = session
+        self.url = url
+        self._heartbeat = heartbeat
+
+    @classmethod
+    def for_local_host(
+        cls, session: ClientSession, host: str
+    ) -> "WebSocketPushTransport":
+        """Return the push stream of a bridge on the LAN, see LocalTransport."""
+        if "://" not in host:
+            host = f"http://{host}"
+        scheme, rest = host.rstrip("/").split("://", 1)
+        scheme = "wss" if scheme == "https" else "ws"
+        return cls(session, f"{scheme}://{rest}{LOCAL_PUSH_PATH}")
+
+    @asynccontextmanager
+    async def subscribe(self):
+        async with self._session.ws_connect(
+            self.url, heartbeat=self._heartbeat
+        ) as ws:
+            yield self._events(ws)
+
+    async def _events(self, ws) -> AsyncIterator[PushEvent]:
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                if msg.type == WSMsgType.ERROR:
+                    raise ws.exception() or ConnectionError("websocket error")
+                continue
+            try:
+                data = json.loads(msg.data)
+                yield PushEvent(data["deviceId"], data["reported"])
+            except (ValueError, KeyError, TypeError):
+                _LOGGER.debug("Ignoring malformed push message %r", msg.data)
+
+
+class PushSubscriber:
+    """Feed pushed reports into devices through Device.update_from_report,
+    the same snapshot and observer path polling uses. While the stream is
+    down it reconnects with backoff and on_connection_change(False) lets
+    the caller fall back to polling.
+    """
+
+    def __init__(
+        self,
+        transport: PushTransport,
+        find_device: Callable[[str], Optional[Any]],
+        on_connection_change: Optional[Callable[[bool], None]] = None,
+        reconnect_policy: RetryPolicy = DEFAULT_RECONNECT_POLICY,
+    ) -> None:
+        self._transport = transport
+        self._find_device = find_device
+        self._on_connection_change = on_connection_change
+        self._reconnect_policy = reconnect_policy
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.events_received = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.connected = False
+
+    def _set_connected(self, connected: bool) -> None:
+        if connected == self.connected:
+            return
+        self.connected = connected
+        if self._on_connection_change is not None:
+            self._on_connection_change(connected)
+
+    async def _run(self) -> None:
+        attempt = 0
+        while True:
+            try:
+                async with self._transport.subscribe() as events:
+                    self._set_connected(True)
+                    attempt = 0
+                    async for event in events:
+                        self.events_received += 1
+                        device = self._find_device(event.device_id)
+                        if device is not None:
+                            device.update_from_report(event.reported)
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:  # pylint: disable=broad-except
+                _LOGGER.debug("Push stream failed: %r", ex)
+
+            self._set_connected(False)
+            delay = self._reconnect_policy.delay(attempt)
+            attempt = min(attempt + 1, _MAX_BACKOFF_EXPONENT)
+            await asyncio.sleep(delay)
@@ -0,0 +1,81 @@
+""" Token-bucket rate limiting of Haier API requests """
+import asyncio
+from datetime import timedelta
+import time
+from typing import NamedTuple
+
+from .const import PRIORITY_BACKGROUND
+from .priority import DEFAULT_AGING, PrioritySemaphore
+
+
+class RateLimit(NamedTuple):
+    """Sustained request rate and burst size of one bucket."""
+
+    requests_per_minute: float
+    burst: int
+
+
+class RateLimitStats(NamedTuple):
+    """Wait-time metrics of one bucket."""
+
+    acquired: int
+    waiting: int
+    total_wait: float
+    max_wait: float
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+
+class TokenBucket:
+    """Queue callers until a token is available.
+    Callers are served by priority class with aging, nothing is dropped.
+    """
+
+    def __init__(
+        self, name: str, limit: RateLimit, aging: timedelta = DEFAULT_AGING
+    ) -> None:
+        self.name = name
+        self._rate = limit.requests_per_minute / 60
+        self._capacity = limit.burst
+        self._tokens = float(limit.burst)
+        self._updated_at = time.monotonic()
+        # Only the head of the queue waits for the next token
+        self._queue = PrioritySemaphore(1, aging)
+        self._acquired = 0
+        self._waiting = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+
+    async def acquire(self, priority: int = PRIORITY_BACKGROUND) -> float:
+        """Take one token, waiting for it if needed. Return the seconds waited."""
+        started_at = time.monotonic()
+        self._waiting += 1
+        try:
+            async with self._queue.slot(priority):
+                self._refill(time.monotonic())
+                while self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) / self._rate)
+                    self._refill(time.monotonic())
+                self._tokens -= 1
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - started_at
+        self._acquired += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        return waited
+
+    @property
+    def stats(self) -> RateLimitStats:
+        return RateLimitStats(
+            self._acquired, self._waiting, self._total_wait, self._max_wait
+        )
@@ -0,0 +1,92 @@
+""" Retry and circuit breaking for Haier API requests """
+import asyncio
+from datetime import timedelta
+import random
+import time
+from typing import NamedTuple
+
+from aiohttp import ClientConnectionError, ClientResponseError
+
+from .exceptions import HaierApiError, HaierCircuitOpenError
+
+RETRYABLE_HTTP_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+
+DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 5
+DEFAULT_CIRCUIT_RESET_TIMEOUT = timedelta(seconds=30)
+
+
+class RetryPolicy(NamedTuple):
+    """Capped exponential backoff with full jitter."""
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    def delay(self, attempt: int) -> float:
+        """Return seconds to wait before retrying after the given (0 based) attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+def is_retryable(ex: BaseException, retryable_ret_codes=frozenset()) -> bool:
+    """Return True if the request that raised ex may succeed when repeated."""
+    if isinstance(ex, HaierCircuitOpenError):
+        return False
+    if isinstance(ex, (asyncio.TimeoutError, ClientConnectionError)):
+        return True
+    if isinstance(ex, ClientResponseError):
+        return ex.status in RETRYABLE_HTTP_STATUS
+    if isinstance(ex, HaierApiError):
+        return ex.ret_code in retryable_ret_codes
+    return False
+
+
+class CircuitBreaker:
+    """Fail fast while an endpoint keeps failing.
+    The circuit opens after failure_threshold consecutive retryable failures.
+    Once reset_timeout has passed a single trial request is let through,
+    its outcome closes the circuit again or re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: timedelta = DEFAULT_CIRCUIT_RESET_TIMEOUT,
+    ) -> None:
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout.total_seconds()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_request(self) -> None:
+        """Raise HaierCircuitOpenError if the request must not be sent."""
+        if self._opened_at is None:
+            return
+        if self._trial_in_flight or (
+            time.monotonic() - self._opened_at < self._reset_timeout
+        ):
+            raise HaierCircuitOpenError(
+                f"Circuit for {self.name} is open after {self._failures} failures"
+            )
+        self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_cancelled(self) -> None:
+        """Let another trial request through if this one was cancelled."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._trial_in_flight or self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+        self._trial_in_flight = False
@@ -0,0 +1,174 @@
+""" Adaptive per-device polling schedule """
+from collections import deque
+from datetime import timedelta
+import math
+import random
+import time
+from typing import Iterable, Optional
+
+DEFAULT_FAST_INTERVAL = timedelta(seconds=10)
+DEFAULT_NORMAL_INTERVAL = timedelta(seconds=60)
+DEFAULT_SLOW_INTERVAL = timedelta(minutes=5)
+# How long a device is polled fast after a command
+DEFAULT_FAST_WINDOW = timedelta(minutes=1)
+DEFAULT_MAX_POLLS_PER_MINUTE = 60
+
+
+class PollScheduler:
+    """Decide which devices are due for a status fetch.
+    A device is polled fast for a short window after a command, at the
+    normal interval while running and slowly while off or offline. The
+    number of polls is capped account-wide by max_polls_per_minute, except
+    the first poll of a device, so a new fleet gets its state right away.
+
+    Regular polls are spread evenly over the interval: every device owns a
+    slot whose offset is derived from its position in the sorted list of
+    device ids, so the fleet never polls on the same tick. An optional
+    jitter delays each poll by a random amount on top of its slot.
+
+    While pushed reports are flowing polls only act as a safety net at the
+    slow interval. When the push stream drops every device is brought back
+    to its slot within the normal interval.
+    """
+
+    def __init__(
+        self,
+        fast_interval: timedelta = DEFAULT_FAST_INTERVAL,
+        normal_interval: timedelta = DEFAULT_NORMAL_INTERVAL,
+        slow_interval: timedelta = DEFAULT_SLOW_INTERVAL,
+        fast_window: timedelta = DEFAULT_FAST_WINDOW,
+        max_polls_per_minute: int = DEFAULT_MAX_POLLS_PER_MINUTE,
+        jitter: timedelta = timedelta(0),
+    ) -> None:
+        self._fast_interval = fast_interval.total_seconds()
+        self._normal_interval = normal_interval.total_seconds()
+        self._slow_interval = slow_interval.total_seconds()
+        self._fast_window = fast_window.total_seconds()
+        self._max_polls_per_minute = max_polls_per_minute
+        self._next_due: dict[str, float] = {}
+        self._fast_until: dict[str, float] = {}
+        self._recent_polls: deque[float] = deque()
+        self._jitter = jitter.total_seconds()
+        self._epoch = time.monotonic()
+        # device id -> slot position as a fraction of the interval
+        self._slots: dict[str, float] = {}
+        self.push_active = False
+
+    def interval_for(self, device, now: Optional[float] = None) -> float:
+        """Return the polling interval in seconds for the device's current state."""
+        if now is None:
+            now = time.monotonic()
+        if self._fast_until.get(device.device_id, 0) > now:
+            return self._fast_interval
+        if self.push_active or not device.availiable or device.on_off_status is False:
+            return self._slow_interval
+        return self._normal_interval
+
+    def notify_command(self, device_id: str) -> None:
+        """Poll the device fast for a while after a command."""
+        now = time.monotonic()
+        self._fast_until[device_id] = now + self._fast_window
+        self._next_due[device_id] = min(
+            self._next_due.get(device_id, now), now + self._fast_interval
+        )
+
+    def probe(self, device_id: str) -> None:
+        """Poll the device right away, e.g. when it came back online."""
+        self._next_due[device_id] = time.monotonic()
+
+    def set_push_active(self, active: bool) -> None:
+        """Poll slowly while pushed reports keep the devices up to date."""
+        if active == self.push_active:
+            return
+        self.push_active = active
+        if not active:
+            now = time.monotonic()
+            for device_id, next_due in self._next_due.items():
+                self._next_due[device_id] = min(
+                    next_due, self._next_slot(device_id, self._normal_interval, now)
+                )
+
+    def forget(self, device_id: str) -> None:
+        self._next_due.pop(device_id, None)
+        self._fast_until.pop(device_id, None)
+        self._slots.pop(device_id, None)
+
+    def _assign_slots(self, devices: Iterable) -> None:
+        device_ids = sorted(d.device_id for d in devices)
+        if device_ids == sorted(self._slots):
+            return
+        self._slots = {
+            device_id: index / len(device_ids)
+            for index, device_id in enumerate(device_ids)
+        }
+
+    def slot_layout(self) -> dict[str, float]:
+        """Return the offset in seconds of each device within the normal interval."""
+        return {
+            device_id: fraction * self._normal_interval
+            for device_id, fraction in sorted(self._slots.items(), key=lambda i: i[1])
+        }
+
+    def _next_slot(self, device_id: str, interval: float, now: float) -> float:
+        """Return the slot of the device closest to one interval from now."""
+        offset = self._epoch + self._slots.get(device_id, 0) * interval
+        cycles = round((now + interval - offset) / interval)
+        next_due = offset + cycles * interval
+        if next_due <= now:
+            next_due += interval * math.ceil((now - next_due) / interval + 1e-9)
+        if self._jitter:
+            next_due += random.uniform(0, self._jitter)
+        return next_due
+
+    def _prune(self, now: float) -> None:
+        while self._recent_polls and self._recent_polls[0] <= now - 60:
+            self._recent_polls.popleft()
+
+    def due(self, devices: list, now: Optional[float] = None) -> list:
+        """Return the devices to poll now, most overdue first.
+        Devices that were never polled are due immediately.
+        """
+        if now is None:
+            now = time.monotonic()
+        self._assign_slots(devices)
+        self._prune(now)
+        budget = max(self._max_polls_per_minute - len(self._recent_polls), 0)
+
+        never_polled = [d for d in devices if d.device_id not in self._next_due]
+        due = [
+            d
+            for d in devices
+            if d.device_id in self._next_due and self._next_due[d.device_id] <= now
+        ]
+        due.sort(key=lambda d: self._next_due[d.device_id])
+        return never_polled + due[:budget]
+
+    def record_poll(self, device, now: Optional[float] = None) -> None:
+        """Record a status fetch of the device and schedule its next one."""
+        if now is None:
+            now = time.monotonic()
+        self._recent_polls.append(now)
+        interval = self.interval_for(device, now)
+        if interval == self._fast_interval:
+            # Fast polls follow the command, not the slot layout
+            self._next_due[device.device_id] = now + interval
+        else:
+            self._next_due[device.device_id] = self._next_slot(
+                device.device_id, interval, now
+            )
+
+    def time_until_next(self, devices: Iterable, now: Optional[float] = None) -> float:
+        """Return seconds until the next device is due, honoring the rate ceiling."""
+        if now is None:
+            now = time.monotonic()
+        self._prune(now)
+        devices = list(devices)
+        if any(d.device_id not in self._next_due for d in devices):
+            return 0
+        wait = min(
+            (self._next_due[d.device_id] - now for d in devices),
+            default=self._normal_interval,
+        )
+        if len(self._recent_polls) >= self._max_polls_per_minute:
+            wait = max(wait, self._recent_polls[0] + 60 - now)
+        return max(wait, 0)
@@ -0,0 +1,109 @@
+""" Parsed device state snapshots """
+from typing import Any, Callable, Optional
+
+from .const import *
+
+
+def _parse_bool(value: str) -> bool:
+    value = value.lower()
+    if value not in ("true", "false", "1", "0"):
+        raise ValueError(f"not a boolean: {value!r}")
+    return value in ("true", "1")
+
+
+class DeviceState:
+    """Immutable snapshot of a reported device state.
+    The raw `reported` payload is decoded once into typed fields, keys that
+    are not fields are dropped. Values that fail to parse are left None and
+    listed in errors.
+    """
+
+    __slots__ = ("on_off_status", "errors")
+
+    # raw key -> (field, parser)
+    FIELDS: dict[str, tuple[str, Callable[[str], Any]]] = {
+        HVAC_ON_OFF_STATUS: ("on_off_status", _parse_bool),
+    }
+
+    def __init__(self, **values: Any) -> None:
+        for attr, _ in self.FIELDS.values():
+            object.__setattr__(self, attr, values.get(attr))
+        object.__setattr__(self, "errors", tuple(values.get("errors", ())))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self) and self.as_dict() == other.as_dict()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.as_dict().items())
+        return f"{type(self).__name__}({fields})"
+
+    @classmethod
+    def parse_value(cls, key: str, value: Any) -> Any:
+        """Decode one raw value, raise KeyError for unknown keys."""
+        _, parser = cls.FIELDS[key]
+        return parser(str(value))
+
+    @classmethod
+    def from_reported(cls, reported: dict[str, Any]) -> "DeviceState":
+        values: dict[str, Any] = {}
+        errors = []
+        for key, (attr, parser) in cls.FIELDS.items():
+            raw = reported.get(key)
+            if raw is None:
+                continue
+            try:
+                values[attr] = parser(str(raw))
+            except (TypeError, ValueError):
+                errors.append((key, raw))
+        return cls(errors=errors, **values)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {attr: getattr(self, attr) for attr, _ in self.FIELDS.values()}
+
+    def replace(self, **changes: Any) -> "DeviceState":
+        """Return a copy with some fields changed."""
+        return type(self)(**{**self.as_dict(), "errors": self.errors, **changes})
+
+    def diff(self, other: Optional["DeviceState"]) -> frozenset[str]:
+        """Return the fields whose value differs from other, all if None."""
+        return frozenset(
+            attr
+            for attr, _ in self.FIELDS.values()
+            if other is None or getattr(self, attr) != getattr(other, attr, None)
+        )
+
+    @classmethod
+    def field_name(cls, key: str) -> Optional[str]:
+        """Return the field a raw key is decoded into."""
+        field = cls.FIELDS.get(key)
+        return field[0] if field else None
+
+
+class HaierACState(DeviceState):
+    """State snapshot of a Haier air conditioner."""
+
+    __slots__ = (
+        "operation_mode",
+        "target_temperature",
+        "room_temperature",
+        "wind_speed",
+        "wind_direction_vertical",
+        "wind_direction_horizontal",
+        "human_sensing_status",
+        "self_cleaning_status",
+    )
+
+    FIELDS = {
+        **DeviceState.FIELDS,
+        HVAC_OPERATION_MODE: ("operation_mode", int),
+        HVAC_TARGET_TEMP: ("target_temperature", int),
+        HVAC_ROOM_TEMP: ("room_temperature", int),
+        HVAC_WIND_SPEED: ("wind_speed", int),
+        HVAC_WIND_DIRECTION_VERTICAL: ("wind_direction_vertical", int),
+        HVAC_WIND_DIRECTION_HORIZONTAL: ("wind_direction_horizontal", int),
+        HVAC_HUMAN_SENSING_STATUS: ("human_sensing_status", _parse_bool),
+        HVAC_SELF_CLEANING_STATUS: ("self_cleaning_status", _parse_bool),
+    }
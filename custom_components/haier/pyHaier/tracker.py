@@ -0,0 +1,109 @@
+""" Track when a device actually applies a command """
+import asyncio
+from collections import deque
+from datetime import timedelta
+import itertools
+import logging
+import time
+from typing import Any, NamedTuple, Optional
+
+from .client import HaierClient
+from .const import PRIORITY_CONFIRM
+
+# Seconds to wait before each status read, the last value repeats
+DEFAULT_ACK_SCHEDULE = (1.0, 1.0, 2.0, 3.0, 5.0)
+DEFAULT_ACK_DEADLINE = timedelta(seconds=30)
+ACK_HISTORY_SIZE = 50
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CommandAck(NamedTuple):
+    """Outcome of tracking one command."""
+
+    device_id: str
+    cmd_args: dict[str, str]
+    converged: bool
+    # Seconds between sending the command and the first matching report
+    latency: Optional[float]
+    attempts: int
+
+    @property
+    def timed_out(self) -> bool:
+        return not self.converged
+
+
+def report_matches(reported: Optional[dict[str, Any]], cmd_args: dict[str, Any]) -> bool:
+    """Return True if every commanded property is reported with its new value."""
+    if reported is None:
+        return False
+    return all(reported.get(k) == str(v).lower() for k, v in cmd_args.items())
+
+
+class ConvergenceTracker:
+    """Re-read device status after a command until the device reports the
+    commanded values or the deadline passes.
+    """
+
+    def __init__(
+        self,
+        client: HaierClient,
+        schedule: tuple[float, ...] = DEFAULT_ACK_SCHEDULE,
+        deadline: timedelta = DEFAULT_ACK_DEADLINE,
+    ) -> None:
+        self._client = client
+        self._schedule = schedule
+        self._deadline = deadline.total_seconds()
+        self.history: deque[CommandAck] = deque(maxlen=ACK_HISTORY_SIZE)
+
+    async def track(
+        self, device, cmd_args: dict[str, Any], sent_at: Optional[float] = None
+    ) -> CommandAck:
+        """Poll the device until it converges on cmd_args.
+        sent_at is the time.monotonic() the command was sent at.
+        Every report read is applied to the device.
+        """
+        if sent_at is None:
+            sent_at = time.monotonic()
+        deadline_at = sent_at + self._deadline
+        attempts = 0
+        ack = None
+
+        delays = itertools.chain(self._schedule, itertools.repeat(self._schedule[-1]))
+        for delay in delays:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(delay, remaining))
+
+            attempts += 1
+            try:
+                reported = await self._client.fetch_device_state(
+                    device, PRIORITY_CONFIRM
+                )
+            except Exception as ex:  # pylint: disable=broad-except
+                _LOGGER.debug("%s: confirmation read failed: %r", device.device_id, ex)
+                continue
+
+            device.update_from_report(reported)
+            if report_matches(reported, cmd_args):
+                ack = CommandAck(
+                    device.device_id,
+                    dict(cmd_args),
+                    True,
+                    time.monotonic() - sent_at,
+                    attempts,
+                )
+                break
+
+        if ack is None:
+            _LOGGER.debug(
+                "%s: device did not converge on %s within %ss",
+                device.device_id,
+                cmd_args,
+                self._deadline,
+            )
+            ack = CommandAck(device.device_id, dict(cmd_args), False, None, attempts)
+
+        self.history.append(ack)
+        return ack
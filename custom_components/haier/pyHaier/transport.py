@@ -0,0 +1,75 @@
+""" Transports carrying Haier API requests """
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Optional
+
+from aiohttp import ClientSession, ClientTimeout
+
+BASE_URL = "https://uws-sea.haieriot.net"
+DEFAULT_LOCAL_TIMEOUT = timedelta(seconds=5)
+
+
+class Transport(ABC):
+    """Send an encoded request to an API path and return the raw response body.
+    HaierClient builds, signs and decodes requests, the transport only
+    decides where they go.
+    """
+
+    @abstractmethod
+    async def post(
+        self, api_path: str, headers: dict[str, str], data: Optional[bytes]
+    ) -> bytes:
+        """Post data to api_path, raise for non-2xx HTTP status."""
+
+
+class HttpTransport(Transport):
+    """Post requests to an HTTP(S) server that serves the API paths."""
+
+    def __init__(
+        self,
+        session: ClientSession,
+        base_url: str,
+        timeout: Optional[timedelta] = None,
+    ) -> None:
+        self._session = session
+        self.base_url = base_url.rstrip("/")
+        self._timeout = (
+            ClientTimeout(total=timeout.total_seconds()) if timeout else None
+        )
+
+    async def post(
+        self, api_path: str, headers: dict[str, str], data: Optional[bytes]
+    ) -> bytes:
+        kwargs = {"timeout": self._timeout} if self._timeout else {}
+        async with self._session.post(
+            self.base_url + api_path,
+            headers=headers,
+            data=data,
+            raise_for_status=True,
+            **kwargs,
+        ) as resp:
+            return await resp.read()
+
+
+class CloudTransport(HttpTransport):
+    """Haier SEA cloud."""
+
+    def __init__(self, session: ClientSession, base_url: str = BASE_URL) -> None:
+        super().__init__(session, base_url)
+
+
+class LocalTransport(HttpTransport):
+    """Bridge on the LAN, e.g. the Haier add-on, selected by its host.
+    It serves the cloud API paths, so requests skip the round trip to the
+    cloud while the Device API stays the same.
+    """
+
+    def __init__(
+        self,
+        session: ClientSession,
+        host: str,
+        timeout: timedelta = DEFAULT_LOCAL_TIMEOUT,
+    ) -> None:
+        if "://" not in host:
+            host = f"http://{host}"
+        super().__init__(session, host, timeout)
@@ -0,0 +1,7 @@
+"""Make pyHaier importable the way the integration imports it."""
+import os
+import sys
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "custom_components", "haier")
+)
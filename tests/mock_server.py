@@ -0,0 +1,270 @@
+""" Local stand-in for the Haier cloud, for tests and benchmarks
+
+Kept out of the integration so it does not ship with it, pyHaier is
+imported from custom_components/haier which must be on sys.path.
+"""
+import asyncio
+from collections import Counter
+import json
+import time
+from typing import Any, Callable, Optional, Union
+
+from aiohttp import web
+
+from pyHaier.client import (
+    API_DIR,
+    DEVICE_CONTROL_API,
+    DEVICE_DETAIL_API,
+    DEVICE_LIST_API,
+    DEVICE_STATUS_API,
+    calculate_sign,
+)
+from pyHaier.const import *
+from pyHaier.push import LOCAL_PUSH_PATH
+from pyHaier.ratelimit import RateLimit
+
+# Latency in seconds, or a callable returning it for an api
+Latency = Union[float, Callable[[str], float]]
+
+
+class MockAC:
+    """Simulated air conditioner, reported values are strings like the cloud's."""
+
+    def __init__(self, device_id: str, name: str, on: bool = True) -> None:
+        self.device_id = device_id
+        self.name = name
+        self.online = True
+        self.reported: dict[str, str] = {
+            HVAC_ON_OFF_STATUS: str(on).lower(),
+            HVAC_OPERATION_MODE: str(HVAC_OPERATION_MODE_COOL),
+            HVAC_TARGET_TEMP: "25",
+            HVAC_ROOM_TEMP: "27",
+            HVAC_WIND_SPEED: str(HVAC_WIND_SPEED_AUTO),
+            HVAC_WIND_DIRECTION_VERTICAL: str(HVAC_WIND_DIRECTION_VERTICAL_AUTO),
+            HVAC_WIND_DIRECTION_HORIZONTAL: str(HVAC_WIND_DIRECTION_HORIZONTAL_AUTO),
+            HVAC_HUMAN_SENSING_STATUS: "false",
+            HVAC_SELF_CLEANING_STATUS: "false",
+        }
+
+    @property
+    def conf(self) -> dict[str, Any]:
+        return {
+            "deviceId": self.device_id,
+            "deviceName": self.name,
+            "deviceType": DEVICE_TYPE_HVAC,
+            "online": self.online,
+            "productCodeT": "MOCK-AC",
+            "productNameT": "Mock AC",
+            "totalPermission": ["get", "set"],
+        }
+
+    def apply(self, cmd_args: dict[str, Any]) -> None:
+        for key, value in cmd_args.items():
+            self.reported[key] = str(value).lower()
+
+
+class _RateWindow:
+    """Reject requests beyond a token-bucket rate instead of queueing them."""
+
+    def __init__(self, limit: RateLimit) -> None:
+        self._rate = limit.requests_per_minute / 60
+        self._capacity = limit.burst
+        self._tokens = float(limit.burst)
+        self._updated_at = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class MockHaierCloud:
+    """aiohttp server for the endpoints HaierClient uses.
+    Requests must carry the sign HaierClient computes, otherwise they are
+    answered with HTTP 400. Commands change the state of the simulated
+    fleet, after command_delay seconds if set.
+
+    Every state change is also pushed to the websocket at LOCAL_PUSH_PATH
+    as {"deviceId": ..., "reported": {...}}, the format
+    WebSocketPushTransport reads. drop_push_connections() cuts the
+    streams, during an outage new ones are refused.
+
+    Faults are injected through the attributes: latency delays every
+    response, outage answers HTTP 503, rate_limits (api -> RateLimit)
+    answers HTTP 429 beyond the rate and fail_next() queues error retCodes.
+    With access_token set, other tokens are answered with
+    RET_CODE_USER_ILLEGAL.
+
+        async with MockHaierCloud(fleet_size=10) as cloud:
+            client = MyHaierClient(session, base_url=cloud.base_url)
+    """
+
+    def __init__(
+        self,
+        fleet_size: int = 1,
+        latency: Latency = 0.0,
+        command_delay: float = 0.0,
+        rate_limits: Optional[dict[str, RateLimit]] = None,
+        access_token: Optional[str] = None,
+    ) -> None:
+        self.devices: dict[str, MockAC] = {}
+        for index in range(fleet_size):
+            self.add_device(f"mock{index:05d}", on=index % 2 == 0)
+        self.latency = latency
+        self.command_delay = command_delay
+        self.outage = False
+        self.access_token = access_token
+        self._rate_windows = {
+            api: _RateWindow(limit) for api, limit in (rate_limits or {}).items()
+        }
+        self._failures: dict[str, list[str]] = {}
+        self.request_counts: Counter[str] = Counter()
+        self.base_url: Optional[str] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._push_connections: set[web.WebSocketResponse] = set()
+        self._push_sends: set[asyncio.Future] = set()
+
+    def add_device(self, device_id: str, name: str = "", on: bool = True) -> MockAC:
+        device = MockAC(device_id, name or f"AC {device_id}", on)
+        self.devices[device_id] = device
+        return device
+
+    def fail_next(self, api: str, ret_code: str, count: int = 1) -> None:
+        """Answer the next count requests to api with ret_code."""
+        self._failures.setdefault(api, []).extend([ret_code] * count)
+
+    def update_device(self, device_id: str, values: dict[str, Any]) -> None:
+        """Change reported values as if the device changed on its own."""
+        self._apply(self.devices[device_id], values)
+
+    @property
+    def push_connections(self) -> int:
+        return len(self._push_connections)
+
+    async def drop_push_connections(self) -> None:
+        for ws in list(self._push_connections):
+            await ws.close()
+
+    def _apply(self, device: MockAC, cmd_args: dict[str, Any]) -> None:
+        device.apply(cmd_args)
+        message = json.dumps(
+            {"deviceId": device.device_id, "reported": dict(device.reported)}
+        )
+        for ws in self._push_connections:
+            task = asyncio.ensure_future(ws.send_str(message))
+            self._push_sends.add(task)
+            task.add_done_callback(self._push_sends.discard)
+
+    async def _handle_push(self, request: web.Request) -> web.WebSocketResponse:
+        if self.outage:
+            raise web.HTTPServiceUnavailable()
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._push_connections.add(ws)
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            self._push_connections.discard(ws)
+        return ws
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        for api in (
+            DEVICE_LIST_API,
+            DEVICE_DETAIL_API,
+            DEVICE_STATUS_API,
+            DEVICE_CONTROL_API,
+        ):
+            app.router.add_post(API_DIR + api, self._handler(api))
+        app.router.add_get(LOCAL_PUSH_PATH, self._handle_push)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve on host:port, a free port by default. Return the base URL."""
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self.drop_push_connections()
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockHaierCloud":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _handler(self, api: str):
+        async def handle(request: web.Request) -> web.Response:
+            self.request_counts[api] += 1
+            if self.outage:
+                raise web.HTTPServiceUnavailable()
+            latency = self.latency(api) if callable(self.latency) else self.latency
+            if latency:
+                await asyncio.sleep(latency)
+            window = self._rate_windows.get(api)
+            if window is not None and not window.take():
+                raise web.HTTPTooManyRequests()
+
+            data = await request.read()
+            sign = calculate_sign(
+                request.path, request.headers.get("timestamp", ""), data
+            )
+            if request.headers.get("sign") != sign:
+                raise web.HTTPBadRequest(text="invalid sign")
+            if (
+                self.access_token is not None
+                and request.headers.get("accessToken") != self.access_token
+            ):
+                return self._reply(RET_CODE_USER_ILLEGAL)
+            if self._failures.get(api):
+                return self._reply(self._failures[api].pop(0))
+
+            body = json.loads(data) if data else {}
+            return self._dispatch(api, body)
+
+        return handle
+
+    def _dispatch(self, api: str, body: dict[str, Any]) -> web.Response:
+        if api == DEVICE_LIST_API:
+            return self._reply(
+                RET_CODE_OK, [device.conf for device in self.devices.values()]
+            )
+
+        device = self.devices.get(body.get("deviceId"))
+        if device is None:
+            return self._reply(RET_CODE_USER_NOT_MATCH_DEVICE)
+        if api == DEVICE_DETAIL_API:
+            return self._reply(RET_CODE_OK, device.conf)
+        if api == DEVICE_STATUS_API:
+            return self._reply(RET_CODE_OK, {"reported": dict(device.reported)})
+
+        cmd_args = body.get("cmdArgs") or {}
+        if self.command_delay:
+            asyncio.get_running_loop().call_later(
+                self.command_delay, self._apply, device, cmd_args
+            )
+        else:
+            self._apply(device, cmd_args)
+        return self._reply(RET_CODE_OK)
+
+    @staticmethod
+    def _reply(ret_code: str, payload: Any = None) -> web.Response:
+        return web.json_response(
+            {"retCode": ret_code, "retInfo": "", "payload": payload}
+        )
@@ -0,0 +1,45 @@
+"""LocalHaierClient against MockHaierCloud standing in for a LAN bridge."""
+import asyncio
+
+from aiohttp import ClientSession
+
+from mock_server import MockHaierCloud
+from pyHaier import create_devices
+from pyHaier.client import LocalHaierClient
+from pyHaier.const import HVAC_TARGET_TEMP, RET_CODE_OK
+
+
+async def _run_local_client() -> None:
+    # An empty access_token makes the mock reject any request carrying a token
+    async with MockHaierCloud(fleet_size=3, access_token="") as cloud:
+        async with ClientSession() as session:
+            client = LocalHaierClient(session, cloud.base_url)
+
+            await client.refresh_confs()
+            devices = create_devices(client, client.device_confs)
+            assert sorted(d.device_id for d in devices) == sorted(cloud.devices)
+
+            device = devices[0]
+            reported = await client.fetch_device_state(device)
+            assert reported == cloud.devices[device.device_id].reported
+
+            ret_code = await client.set_device_state(device, {HVAC_TARGET_TEMP: 17})
+            assert ret_code == RET_CODE_OK
+            reported = await client.fetch_device_state(device)
+            assert reported[HVAC_TARGET_TEMP] == "17"
+
+
+def test_local_client_needs_no_token():
+    asyncio.run(_run_local_client())
+
+
+def test_local_host_without_scheme():
+    async def run():
+        async with MockHaierCloud(fleet_size=1, access_token="") as cloud:
+            async with ClientSession() as session:
+                host = cloud.base_url.split("://", 1)[1]
+                client = LocalHaierClient(session, host)
+                await client.refresh_confs()
+                assert len(client.device_confs) == 1
+
+    asyncio.run(run())
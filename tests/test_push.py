@@ -0,0 +1,93 @@
+"""Pushed reports from MockHaierCloud and the fallback to slot polling."""
+import asyncio
+from datetime import timedelta
+
+from aiohttp import ClientSession
+
+from mock_server import MockHaierCloud
+from pyHaier import create_devices
+from pyHaier.client import HaierClient
+from pyHaier.const import HVAC_ROOM_TEMP, HVAC_TARGET_TEMP
+from pyHaier.push import PushSubscriber, WebSocketPushTransport
+from pyHaier.resilience import RetryPolicy
+from pyHaier.scheduler import PollScheduler
+
+NORMAL_INTERVAL = timedelta(seconds=60)
+SLOW_INTERVAL = timedelta(minutes=5)
+FAST_RECONNECT = RetryPolicy(max_attempts=0, base_delay=0.05, max_delay=0.1)
+
+
+class MockClient(HaierClient):
+    async def async_get_access_token(self) -> str:
+        return ""
+
+
+async def _wait_for(condition, timeout: float = 2.0) -> None:
+    async def wait():
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(wait(), timeout)
+
+
+async def _run_push_lifecycle() -> None:
+    async with MockHaierCloud(fleet_size=2) as cloud, ClientSession() as session:
+        client = MockClient(session, base_url=cloud.base_url)
+        await client.refresh_confs()
+        devices = create_devices(client, client.device_confs)
+        devices_by_id = {device.device_id: device for device in devices}
+        device = devices[0]
+
+        scheduler = PollScheduler(
+            normal_interval=NORMAL_INTERVAL, slow_interval=SLOW_INTERVAL
+        )
+        for polled in scheduler.due(devices):
+            polled.update_from_report(await client.fetch_device_state(polled))
+            scheduler.record_poll(polled)
+
+        subscriber = PushSubscriber(
+            WebSocketPushTransport.for_local_host(session, cloud.base_url),
+            devices_by_id.get,
+            scheduler.set_push_active,
+            FAST_RECONNECT,
+        )
+        subscriber.start()
+        try:
+            # Connect: polling drops to the safety-net interval
+            await _wait_for(lambda: cloud.push_connections == 1)
+            await _wait_for(lambda: subscriber.connected)
+            assert scheduler.push_active
+            assert scheduler.interval_for(device) == SLOW_INTERVAL.total_seconds()
+            scheduler.record_poll(device)
+            assert scheduler.time_until_next([device]) > (
+                NORMAL_INTERVAL.total_seconds()
+            )
+
+            # Event delivery: a command and a spontaneous change are pushed
+            await client.set_device_state(device, {HVAC_TARGET_TEMP: 18})
+            await _wait_for(lambda: device.state.target_temperature == 18)
+            cloud.update_device(device.device_id, {HVAC_ROOM_TEMP: 30})
+            await _wait_for(lambda: device.state.room_temperature == 30)
+            assert subscriber.events_received == 2
+
+            # Stream drops and cannot reconnect: back to slot polling
+            cloud.outage = True
+            await cloud.drop_push_connections()
+            await _wait_for(lambda: not subscriber.connected)
+            assert not scheduler.push_active
+            assert scheduler.interval_for(device) == NORMAL_INTERVAL.total_seconds()
+            assert scheduler.time_until_next([device]) <= (
+                NORMAL_INTERVAL.total_seconds()
+            )
+            assert sorted(scheduler.slot_layout()) == sorted(devices_by_id)
+
+            # Stream comes back
+            cloud.outage = False
+            await _wait_for(lambda: subscriber.connected)
+            assert scheduler.push_active
+        finally:
+            subscriber.stop()
+
+
+def test_push_lifecycle():
+    asyncio.run(_run_push_lifecycle())